@@ -12,7 +12,9 @@
 App that launches a Publish from inside of Shotgun.
 
 It works by identifying a published file (PublishedFile or legacy TankPublishedFile)
-to open, and then launching it.
+to open, and then launching it. Multiple entities can be selected, the published
+files linked to the whole selection are retrieved with a fixed number of Shotgun
+requests, and then resolved and launched for each entity.
 
 The behavior of identifying a valid published file to open is delegated to a hook,
 defined in the config as `hook_get_published_file`.
@@ -50,7 +52,12 @@ the Shotgun Launcher based on the extension of the file.
 operating system.
 
 """
-from sgtk.util import PublishPathNotDefinedError, PublishPathNotSupported
+import os
+import sys
+import time
+from multiprocessing.pool import ThreadPool
+
+from sgtk.util import PublishPathNotDefinedError, PublishPathNotSupported, resolve_publish_path
 from tank.platform import Application
 from tank import TankError
 from tank import Hook
@@ -73,38 +80,539 @@ class LaunchPublish(Application):
         deny_permissions = self.get_setting("deny_permissions")
         deny_platforms = self.get_setting("deny_platforms")
         title = self.get_setting("display_name", "Open in Associated Application")
-        
+
+        tk_shotgun_launchpublish = self.import_module("tk_shotgun_launchpublish")
+        self._tk_shotgun_launchpublish = tk_shotgun_launchpublish
+        # Metrics of the launch in progress, if any.
+        self._metrics = None
+        # Resolved published files, shared by all hooks deriving from BaseHook.
+        self.published_file_cache = tk_shotgun_launchpublish.LRUCache(
+            self.get_setting("published_file_cache_size"),
+            self.get_setting("published_file_cache_ttl")
+        )
+        # Extensions of the valid_extensions setting mapped to their rank.
+        self.extension_ranking = tk_shotgun_launchpublish.ExtensionRanking(
+            self.get_setting("valid_extensions")
+        )
+        # Launchers used by open_with_shotgun_launchapp, keyed by extension.
+        self.launcher_registry = tk_shotgun_launchpublish.LauncherRegistry(
+            self.get_setting("shotgun_launchers")
+        )
+        # Frames of image sequences, scanned once per folder.
+        self.sequence_scanner = tk_shotgun_launchpublish.SequenceScanner()
+        # Checks candidate paths on disk, if enabled.
+        self.path_validator = None
+        if self.get_setting("validate_publish_paths"):
+            self.path_validator = tk_shotgun_launchpublish.PathValidator(
+                self.logger,
+                self.get_setting("validate_publish_paths_workers"),
+                sequence_scanner=self.sequence_scanner
+            )
+        # tk-multi-launchapp commands keyed by engine name.
+        self.launchapp_commands = tk_shotgun_launchpublish.LaunchappCommandIndex()
+        # Starts applications in detached processes for the launch hooks.
+        self.process_launcher = tk_shotgun_launchpublish.ProcessLauncher(
+            self.logger,
+            readiness_timeout=self.get_setting("launch_readiness_timeout"),
+            handoff_timeout=self.get_setting("launch_handoff_timeout")
+        )
+        # Resolution results shared across processes, if enabled.
+        self.resolution_cache = None
+        if self.get_setting("use_persistent_cache"):
+            self.resolution_cache = tk_shotgun_launchpublish.ResolutionCache(
+                os.path.join(self.cache_location, "resolution_cache.sqlite")
+            )
+        # Local copies of published files on slow storage, if enabled.
+        self.staging_cache = None
+        if self.get_setting("staging_cache_size"):
+            self.staging_cache = tk_shotgun_launchpublish.StagingCache(
+                os.path.expanduser(os.path.expandvars(
+                    self.get_setting("staging_cache_location") or os.path.join(self.cache_location, "staging")
+                )),
+                self.get_setting("staging_cache_size") * 1024 * 1024,
+                self.logger,
+                extensions=self.get_setting("staging_extensions"),
+                sequence_scanner=self.sequence_scanner
+            )
+        # App instances started by open_with_configured_app, if reused.
+        self.viewer_registry = None
+        if self.get_setting("reuse_app_instance"):
+            self.viewer_registry = tk_shotgun_launchpublish.ViewerRegistry(
+                self.resolution_cache or tk_shotgun_launchpublish.ResolutionCache(
+                    os.path.join(self.cache_location, "resolution_cache.sqlite")
+                )
+            )
+        # Environments providing launchers, checked before changing context.
+        self.launcher_probe = tk_shotgun_launchpublish.LauncherProbe(
+            self.sgtk,
+            self.logger,
+            self._get_config_version(),
+            self.get_setting("missing_launcher_ttl"),
+            persistent_cache=self.resolution_cache
+        )
+        # Entities folders were created for by the launch hooks.
+        self.folder_creation = tk_shotgun_launchpublish.FolderCreationRegistry(
+            self.sgtk,
+            self.logger,
+            enabled=self.get_setting("remember_folder_creation"),
+            persistent_cache=self.resolution_cache
+        )
+        # Contexts built by the launch hooks, keyed by task, entity or folder.
+        self.context_cache = tk_shotgun_launchpublish.ContextCache(
+            self.sgtk,
+            self.logger,
+            self.get_setting("context_cache_size"),
+            self.get_setting("context_cache_ttl"),
+            self._get_config_version(),
+            persistent_cache=self.resolution_cache if self.get_setting("persist_contexts") else None
+        )
+        # Launch hooks which recently failed, skipped for a while.
+        self.hook_failures = tk_shotgun_launchpublish.HookFailureRegistry(
+            self.get_setting("failed_hook_ttl"),
+            self._get_config_version(),
+            persistent_cache=self.resolution_cache
+        )
+        # Site level facts, read once instead of on each launch.
+        self.published_file_entity_type = tank.util.get_published_file_entity_type(self.sgtk)
+        self.schema_cache = tk_shotgun_launchpublish.SchemaCache(
+            self,
+            self.logger,
+            self.get_setting("schema_cache_ttl"),
+            self._get_config_version(),
+            persistent_cache=self.resolution_cache if self.get_setting("persist_schema") else None
+        )
+        self._resolver = tk_shotgun_launchpublish.PublishedFileResolver(
+            self,
+            BaseHook.PUBLISHED_FILE_FIELDS,
+            use_reverse_query=self.get_setting("resolve_with_reverse_query"),
+            cache=self.published_file_cache,
+            persistent_cache=self.resolution_cache,
+            extensions=(
+                self.get_setting("valid_extensions")
+                if self.get_setting("filter_extensions_on_server") else None
+            ),
+            limit=self.get_setting("filter_extensions_limit"),
+            schema=self.schema_cache
+        )
+
+        # The socket of the resident launch service, if enabled.
+        self._launch_service_socket = None
+        self._serving_launch_requests = False
+        if self.get_setting("use_launch_service"):
+            if tk_shotgun_launchpublish.is_daemon_supported():
+                self._launch_service_socket = tk_shotgun_launchpublish.get_socket_path(
+                    self.sgtk.pipeline_configuration.get_path()
+                )
+            else:
+                self.logger.debug("The launch service is not supported on %s." % sys.platform)
+
         p = {
             "title": title,
             "deny_permissions": deny_permissions,
             "deny_platforms": deny_platforms,
-            "supports_multiple_selection": False
+            "supports_multiple_selection": True
         }
         
+        self._create_hook_instances()
+
         self.engine.register_command("launch_publish", self.launch_publish, p)
 
+        if self._launch_service_socket:
+            self.engine.register_command(
+                "serve_launch_publish_requests",
+                self.serve_launch_requests,
+                {
+                    "title": "Start Launch Publish Service",
+                    "deny_permissions": deny_permissions,
+                    "deny_platforms": deny_platforms,
+                    "supports_multiple_selection": True
+                }
+            )
+
+        if self.hook_failures.enabled:
+            self.engine.register_command(
+                "reset_launch_publish_failures",
+                self.reset_hook_failures,
+                {
+                    "title": "Reset Launch Publish Failures",
+                    "deny_permissions": deny_permissions,
+                    "deny_platforms": deny_platforms,
+                    "supports_multiple_selection": True
+                }
+            )
+
+        if self.get_setting("persist_schema"):
+            self.engine.register_command(
+                "refresh_launch_publish_schema",
+                self.refresh_schema_cache,
+                {
+                    "title": "Refresh Launch Publish Schema",
+                    "deny_permissions": deny_permissions,
+                    "deny_platforms": deny_platforms,
+                    "supports_multiple_selection": True
+                }
+            )
+
+    @property
+    def shotgun(self):
+        """
+        The Shotgun API connection, recording requests in the metrics of the
+        current launch, if any.
+        """
+        shotgun = super(LaunchPublish, self).shotgun
+        # The connection can be used before init_app is called.
+        metrics = getattr(self, "_metrics", None)
+        if metrics is not None:
+            # Connections are per thread, e.g. in launch hook checks.
+            metrics.track_shotgun(shotgun)
+        return shotgun
+
+    def measure(self, phase):
+        """
+        Return a context manager measuring the time spent in a phase of the
+        current launch.
+
+        :param str phase: The name of the phase.
+        :returns: A context manager.
+        """
+        metrics = getattr(self, "_metrics", None)
+        if metrics is None:
+            return _NullSpan()
+        return metrics.span(phase)
+
+    def commit_launch(self):
+        """
+        Check that the launch hook running in the current thread was not
+        cancelled, before it launches anything.
+
+        :raises: :class:`WatchdogTimeout` if the hook timed out.
+        """
+        self._tk_shotgun_launchpublish.commit_launch()
+
     def launch_publish(self, entity_type, entity_ids):
-        published_file_entity_type = tank.util.get_published_file_entity_type(self.tank)
-        if len(entity_ids) != 1:
-            raise Exception("Action only accepts a single item.")
+        """
+        Launch a published file for each of the given entities.
 
-        # First, get a list of published files from the entity provided.
-        if entity_type == published_file_entity_type:
-            published_files = [{"type": entity_type, "id": entity_ids[0]}]
-        else:
-            # The entity is not a published file. Try to retrieve
-            # its published file(s)
-            if published_file_entity_type == "PublishedFile":
-                published_files_field = "published_files"
+        The published files linked to the whole selection are retrieved upfront,
+        with a fixed number of Shotgun requests. A published file is then
+        resolved and launched for each entity, with the resolver hook working
+        on the prefetched data. If `batch_launch` is enabled, the resolved
+        published files are first launched at once, see
+        :meth:`BaseHook.execute_batch`.
+
+        Timings of each phase and Shotgun requests are collected and reported
+        as a single record per call, see `hook_launch_metrics`.
+
+        If `use_launch_service` is enabled and the launch service is running,
+        the request is forwarded to it instead, see :meth:`serve_launch_requests`.
+
+        :param str entity_type: A Shotgun entity type.
+        :param list entity_ids: A list of Shotgun entity ids.
+        """
+        if (
+            self._launch_service_socket
+            and not self._serving_launch_requests
+            and self._forward_launch(entity_type, entity_ids)
+        ):
+            return
+        self._launch_in_process(entity_type, entity_ids)
+
+    def serve_launch_requests(self, entity_type=None, entity_ids=None):
+        """
+        Run the resident launch service, handling launch requests sent over a
+        Unix socket with this engine, until it is idle for
+        `launch_service_idle_timeout` seconds.
+
+        :param str entity_type: Ignored, passed when run as an engine command.
+        :param list entity_ids: Ignored, passed when run as an engine command.
+        """
+        service = self._tk_shotgun_launchpublish.LaunchDaemon(
+            self._launch_service_socket,
+            self._handle_launch_request,
+            logger=self.logger
+        )
+        self._serving_launch_requests = True
+        try:
+            service.serve(idle_timeout=self.get_setting("launch_service_idle_timeout"))
+        except (RuntimeError, OSError, IOError) as e:
+            self.log_error("Failed to run the launch service: %s" % e)
+        finally:
+            self._serving_launch_requests = False
+
+    def _handle_launch_request(self, entity_type, entity_ids):
+        """
+        Launch published files for a request received by the launch service.
+
+        Launch hooks can change the engine context, the context the service
+        was started with is restored after each request, so a request does not
+        depend on the ones handled before it.
+
+        :param str entity_type: A Shotgun entity type.
+        :param list entity_ids: A list of Shotgun entity ids.
+        :returns: A dictionary with the number of launched and failed files.
+        """
+        original_context = self.engine.context
+        try:
+            metrics = self._launch_in_process(entity_type, entity_ids)
+        finally:
+            # The engine may have been restarted by a context change.
+            if tank.platform.current_engine().context != original_context:
+                self.logger.debug("Restoring context %s" % original_context)
+                try:
+                    tank.platform.change_context(original_context)
+                except Exception as e:
+                    self.log_error("Failed to restore context %s: %s" % (original_context, e))
+        return {"launched": metrics.launched, "failed": metrics.failed}
+
+    def _forward_launch(self, entity_type, entity_ids):
+        """
+        Forward a launch to the launch service, if it is running.
+
+        :param str entity_type: A Shotgun entity type.
+        :param list entity_ids: A list of Shotgun entity ids.
+        :returns: True if the launch service handled the request, False if it
+                  is not running.
+        """
+        start = time.time()
+        try:
+            response = self._tk_shotgun_launchpublish.forward_launch(
+                self._launch_service_socket,
+                entity_type,
+                entity_ids,
+                timeout=self.get_setting("launch_service_timeout")
+            )
+        except RuntimeError as e:
+            # The service may have launched some files, don't launch them again.
+            self.log_error("Failed to launch publish with the launch service: %s" % e)
+            return True
+        if response is None:
+            self.logger.debug("Launch service is not running, launching in process.")
+            return False
+        self.logger.debug("Launch service launched %d and failed %d files in %.3fs" % (
+            response["launched"], response["failed"], time.time() - start
+        ))
+        return True
+
+    def _launch_in_process(self, entity_type, entity_ids):
+        """
+        Launch a published file for each of the given entities, in this process.
+
+        :param str entity_type: A Shotgun entity type.
+        :param list entity_ids: A list of Shotgun entity ids.
+        :returns: The :class:`LaunchMetrics` of the launch.
+        """
+        metrics = self._tk_shotgun_launchpublish.LaunchMetrics(entity_type, entity_ids)
+        self._metrics = metrics
+        # Record the requests the Toolkit core makes with its own connection
+        # as well, e.g. to build contexts, create folders or change context.
+        metrics.track_shotgun(self.sgtk.shotgun)
+        try:
+            self._launch_publish(entity_type, entity_ids, metrics)
+        finally:
+            self._metrics = None
+            metrics.stop_tracking()
+            self._report_metrics(metrics)
+        return metrics
+
+    def _launch_publish(self, entity_type, entity_ids, metrics):
+        """
+        Launch a published file for each of the given entities.
+
+        :param str entity_type: A Shotgun entity type.
+        :param list entity_ids: A list of Shotgun entity ids.
+        :param metrics: The :class:`LaunchMetrics` of this launch.
+        """
+        published_file_entity_type = self.published_file_entity_type
+
+        # First, get the published files linked to each entity provided.
+        with metrics.span("entity_lookup"):
+            linked_published_files = self._resolver.get_linked_published_files(
+                published_file_entity_type,
+                entity_type,
+                entity_ids
+            )
+
+        resolved_published_files = []
+        for entity_id in entity_ids:
+            published_files = linked_published_files.get(entity_id)
+            if not published_files:
+                self.log_error(
+                    "Sorry, this can only be used on %ss with an associated published file. "
+                    "No published file found for %s %s." % (entity_type, entity_type, entity_id)
+                )
+                metrics.failed += 1
+                continue
+            with metrics.span("resolve_published_file"):
+                published_file = self._resolve_published_file(
+                    published_file_entity_type,
+                    published_files,
+                    entity_type,
+                    entity_id
+                )
+            if published_file:
+                resolved_published_files.append(published_file)
+            else:
+                metrics.failed += 1
+        self.logger.debug("Resolved published files cache: %r" % self.published_file_cache)
+
+        if len(resolved_published_files) > 1 and self.get_setting("batch_launch"):
+            launched = self._launch_published_files_batch(resolved_published_files)
+            metrics.launched += len(launched)
+            # Only launch the published files the batch did not launch.
+            launched_ids = set(id(published_file) for published_file in launched)
+            resolved_published_files = [
+                published_file for published_file in resolved_published_files
+                if id(published_file) not in launched_ids
+            ]
+        for published_file in resolved_published_files:
+            if self._launch_published_file(published_file):
+                metrics.launched += 1
             else:
-                published_files_field = "tank_published_file"
+                metrics.failed += 1
 
-            v = self.shotgun.find_one(entity_type, [["id", "is", entity_ids[0]]], [published_files_field])
-            if not v.get(published_files_field):
-                raise TankError("Sorry, this can only be used on %ss with an associated published file." % entity_type)
-            published_files = v[published_files_field]
+    def _report_metrics(self, metrics):
+        """
+        Log the metrics of a launch as a JSON line and pass them to the
+        `hook_launch_metrics` hook.
+
+        :param metrics: The :class:`LaunchMetrics` of the launch.
+        """
+        self.logger.debug("Launch metrics: %s" % metrics.to_json())
+        try:
+            self._launch_metrics_hook.execute(metrics=metrics.as_dict())
+        except Exception as e:
+            # Metrics must never prevent a launch.
+            self.logger.warning("Failed to report launch metrics: %s" % e)
+            self.logger.debug("Failed to report launch metrics: %s" % e, exc_info=True)
+
+    def invalidate_published_file_cache(self, published_file_type=None, published_file_id=None):
+        """
+        Remove a published file from the resolved published files cache, or all
+        of them if no published file is given.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param int published_file_id: A Shotgun ID.
+        """
+        if published_file_type is None or published_file_id is None:
+            self.published_file_cache.invalidate()
+        else:
+            self.published_file_cache.invalidate((published_file_type, published_file_id))
 
-        # Then, resolve a valid published file.
+    def post_context_change(self, old_context, new_context):
+        """
+        Runs after a context change, recreate hook instances.
+
+        :param old_context: The context being changed away from.
+        :param new_context: The context being changed to.
+        """
+        self._create_hook_instances()
+        self.launchapp_commands.invalidate()
+
+    def reset_hook_failures(self, entity_type=None, entity_ids=None):
+        """
+        Log the launch hook failures currently remembered, then forget all of
+        them so all launch hooks are tried again.
+
+        :param str entity_type: Ignored, passed when run as an engine command.
+        :param list entity_ids: Ignored, passed when run as an engine command.
+        """
+        failures = self.hook_failures.get_failures()
+        if failures:
+            for failure in failures:
+                self.log_info(
+                    "%s failed for '%s' files, skipped for %ds: %s" % (
+                        failure["hook"],
+                        failure["extension"],
+                        max(0, failure["expires_at"] - time.time()),
+                        failure["error"]
+                    )
+                )
+        else:
+            self.log_info("No launch hook failures remembered.")
+        self.hook_failures.reset()
+        self.log_info("Launch hook failures were reset.")
+
+    def refresh_schema_cache(self, entity_type=None, entity_ids=None):
+        """
+        Forget the facts remembered about the schema of the Shotgun site, e.g.
+        after fields were added to it, so requests it rejected are tried again.
+
+        :param str entity_type: Ignored, passed when run as an engine command.
+        :param list entity_ids: Ignored, passed when run as an engine command.
+        """
+        self.schema_cache.invalidate()
+        self._resolver.invalidate_schema()
+        self.log_info("Requests rejected by the Shotgun site will be tried again on the next launch.")
+
+    def prune_persistent_cache(self, max_age=None):
+        """
+        Remove entries older than the given age from the on-disk resolution
+        cache, or all entries.
+
+        :param float max_age: A number of seconds, or None to remove all entries.
+        :returns: The number of removed entries.
+        """
+        if self.resolution_cache is None:
+            return 0
+        removed = self.resolution_cache.prune(max_age)
+        self.logger.debug("Removed %d entries from %s" % (removed, self.resolution_cache.path))
+        return removed
+
+    def destroy_app(self):
+        """
+        Release resources held by the app.
+        """
+        if self.resolution_cache is not None:
+            self.resolution_cache.close()
+        if self.viewer_registry is not None:
+            self.viewer_registry.close()
+
+    def _create_hook_instances(self):
+        """
+        Resolve the configured hooks and create their instances, so they are
+        not resolved again on each launch.
+        """
+        start = time.time()
+        self._launch_hook_instances = dict(
+            (launch_hook_expr, self.create_hook_instance(launch_hook_expr, base_class=BaseHook))
+            for launch_hook_expr in self.get_setting("launch_publish_hooks")
+        )
+        try:
+            self._get_published_file_hook = self.create_hook_instance(
+                self.get_setting("hook_get_published_file"),
+                base_class=BaseHook
+            )
+        except TankError as e:
+            # Legacy hook values can only be resolved from their setting,
+            # execute the hook from its setting on each launch instead.
+            self.logger.debug("Cannot create hook_get_published_file instance: %s" % e)
+            self._get_published_file_hook = None
+        # Receives the metrics of each launch.
+        self._launch_metrics_hook = self.create_hook_instance(self.get_setting("hook_launch_metrics"))
+        # Used by open_with_configured_app to talk to running app instances.
+        self.viewer_protocol = None
+        if self.viewer_registry is not None:
+            self.viewer_protocol = self.create_hook_instance(
+                self.get_setting("hook_viewer_protocol"),
+                base_class=BaseHook
+            )
+        self.logger.debug(
+            "Created %d hook instances in %.3fs, saved on each launch." % (
+                len(self._launch_hook_instances) + (1 if self._get_published_file_hook else 0) + 1,
+                time.time() - start
+            )
+        )
+
+    def _resolve_published_file(self, published_file_type, published_files, entity_type, entity_id):
+        """
+        Resolve a valid published file from the published files linked to an entity.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param list published_files: The published files linked to the entity.
+        :param str entity_type: The type of the entity the published files were retrieved from.
+        :param int entity_id: The id of the entity the published files were retrieved from.
+        :returns: A published file entity dict, or None if it can't be resolved.
+        """
         # The basic hook, get_published_file, just returns the
         # published file in case of a single file, and the first one in case of
         # multiple. Other hooks, like get_valid_published_file will
@@ -115,35 +623,98 @@ class LaunchPublish(Application):
                 hook_method = "resolve_single_file"
             else:
                 hook_method = "resolve_multiple_files"
-            published_file = self.execute_hook_method(
-                "hook_get_published_file",
-                hook_method,
-                published_file_type=published_file_entity_type,
-                published_files=published_files,
-                base_class=BaseHook
+            if self._get_published_file_hook is None:
+                return self.execute_hook_method(
+                    "hook_get_published_file",
+                    hook_method,
+                    published_file_type=published_file_type,
+                    published_files=published_files,
+                    base_class=BaseHook
+                )
+            return getattr(self._get_published_file_hook, hook_method)(
+                published_file_type=published_file_type,
+                published_files=published_files
             )
         except (TankError, PublishPathNotDefinedError, PublishPathNotSupported) as e:
             self.log_error(
                 "Failed to get a published file for %s %s: %s" % (
-                    published_file_entity_type,
-                    entity_ids[0],
+                    entity_type,
+                    entity_id,
                     e
                 )
             )
-            return
+            return None
+
+    def _launch_published_file(self, published_file):
+        """
+        Try to open the published file using launch hooks, in order.
 
-        # Finally, try to open the published file using launch hooks.
+        Hooks are always tried in the configured order. Hooks which recently
+        failed for the published file extension are skipped, see the
+        `failed_hook_ttl` setting.
+
+        Hooks can be given a timeout, and the whole chain a deadline. A hook
+        which times out before launching anything is cancelled and the next
+        hook is tried, see :meth:`BaseHook.commit_launch`. Timeouts are not
+        recorded as hook failures.
+
+        If `check_launch_hooks` is enabled, the `can_launch` method of all
+        hooks is evaluated concurrently before executing any of them, and
+        hooks which can't launch the file are skipped.
+
+        :param dict published_file: The published file entity dict to launch.
+        :returns: True if the published file was launched, False otherwise.
+        """
         launch_hooks = self.get_setting("launch_publish_hooks")
+        hook_timeout = self.get_setting("launch_hook_timeout")
+        hook_timeouts = self.get_setting("launch_hook_timeouts") or {}
+        deadline = self.get_setting("launch_deadline")
+        launch_start = time.time()
+        extension = self._get_published_file_extension(published_file)
         errors = []
+        candidate_hooks = []
         for launch_hook_expr in launch_hooks:
+            if self.hook_failures.is_failing(launch_hook_expr, extension):
+                self.logger.debug("Skipping %s which recently failed for '%s' files." % (
+                    launch_hook_expr, extension
+                ))
+                errors.append("%s skipped, it recently failed for '%s' files." % (
+                    launch_hook_expr, extension
+                ))
+                continue
+            candidate_hooks.append(launch_hook_expr)
+        hook_instances = self._launch_hook_instances
+        if self.get_setting("check_launch_hooks"):
+            candidate_hooks = self._check_launch_hooks(
+                published_file,
+                candidate_hooks,
+                hook_instances,
+                errors
+            )
+        for launch_hook_expr in candidate_hooks:
+            timeout = hook_timeouts.get(launch_hook_expr, hook_timeout)
+            if deadline:
+                remaining = deadline - (time.time() - launch_start)
+                if remaining <= 0:
+                    errors.append("Launch deadline of %.1fs exceeded, %s was not tried." % (
+                        deadline, launch_hook_expr
+                    ))
+                    break
+                timeout = min(timeout, remaining) if timeout else remaining
+            hook_start = time.time()
             try:
-                self.execute_hook_expression(
-                    launch_hook_expr,
-                    "execute",
-                    base_class=BaseHook,
-                    published_file=published_file
-                )
-                return
+                hook_instance = hook_instances[launch_hook_expr]
+                with self.measure("launch_hook"):
+                    self._tk_shotgun_launchpublish.run_with_timeout(
+                        lambda hook_instance=hook_instance: hook_instance.execute(published_file=published_file),
+                        timeout,
+                        name=launch_hook_expr
+                    )
+                self.logger.debug("Launched %s with %s in %.3fs" % (
+                    published_file, launch_hook_expr, time.time() - hook_start
+                ))
+                self.hook_failures.record_success(launch_hook_expr, extension)
+                return True
             except Exception as e:
                 message = "Failed to launch publish for %s with %s: %s" % (
                     published_file,
@@ -151,31 +722,495 @@ class LaunchPublish(Application):
                     e
                 )
                 self.logger.debug(message, exc_info=True)
-                errors.append(str(e))
+                errors.append("%s (%.2fs): %s" % (launch_hook_expr, time.time() - hook_start, e))
+                # A slow hook is not a broken one, don't skip it next time.
+                if not isinstance(e, self._tk_shotgun_launchpublish.WatchdogTimeout):
+                    self.hook_failures.record_failure(launch_hook_expr, extension, str(e))
         self.log_error(
             "Failed to Launch publish for %s: %s" % (
                 published_file, "\n".join(errors)
             ),
         )
+        return False
+
+    def _launch_published_files_batch(self, published_files):
+        """
+        Try to open all the given published files at once, with the first
+        launch hook supporting it.
+
+        Like single launches, hooks which recently failed for the extension of
+        any of the files are skipped, the hook is given the launch deadline as
+        timeout, and its failures are recorded.
+
+        :param list published_files: The published file entity dicts to launch.
+        :returns: The list of published files which were launched, the other
+                  ones should be launched one by one.
+        """
+        hook_timeout = self.get_setting("launch_hook_timeout")
+        hook_timeouts = self.get_setting("launch_hook_timeouts") or {}
+        deadline = self.get_setting("launch_deadline")
+        extensions = sorted(set(
+            self._get_published_file_extension(published_file) for published_file in published_files
+        ))
+        for launch_hook_expr in self.get_setting("launch_publish_hooks"):
+            hook_instance = self._launch_hook_instances[launch_hook_expr]
+            if any(self.hook_failures.is_failing(launch_hook_expr, extension) for extension in extensions):
+                self.logger.debug("Not launching a batch with %s which recently failed." % launch_hook_expr)
+                continue
+            try:
+                if not hook_instance.can_launch_batch(published_files):
+                    continue
+            except Exception as e:
+                self.logger.debug(
+                    "Failed to check if %s can launch a batch: %s" % (launch_hook_expr, e),
+                    exc_info=True
+                )
+                continue
+            timeout = hook_timeouts.get(launch_hook_expr, hook_timeout)
+            if deadline:
+                timeout = min(timeout, deadline) if timeout else deadline
+            start = time.time()
+            try:
+                with self.measure("launch_batch"):
+                    self._tk_shotgun_launchpublish.run_with_timeout(
+                        lambda: hook_instance.execute_batch(published_files=published_files),
+                        timeout,
+                        name=launch_hook_expr
+                    )
+            except Exception as e:
+                launched = e.launched if isinstance(e, BatchLaunchError) else []
+                self.logger.warning(
+                    "Failed to launch %d published files with %s, launching them "
+                    "one by one: %s" % (len(published_files) - len(launched), launch_hook_expr, e)
+                )
+                self.logger.debug("Failed to launch batch: %s" % e, exc_info=True)
+                # A slow hook is not a broken one, don't skip it next time.
+                if not isinstance(e, self._tk_shotgun_launchpublish.WatchdogTimeout):
+                    for extension in extensions:
+                        self.hook_failures.record_failure(launch_hook_expr, extension, str(e))
+                return launched
+            self.logger.debug("Launched %d published files with %s in %.3fs" % (
+                len(published_files), launch_hook_expr, time.time() - start
+            ))
+            for extension in extensions:
+                self.hook_failures.record_success(launch_hook_expr, extension)
+            return published_files
+        return []
+
+    def _check_launch_hooks(self, published_file, launch_hooks, hook_instances, errors):
+        """
+        Evaluate concurrently whether the given hooks can launch the published
+        file.
+
+        :param dict published_file: The published file entity dict to launch.
+        :param list launch_hooks: The launch hook expressions, in order.
+        :param dict hook_instances: Hook instances keyed by hook expression,
+                                    created in init_app.
+        :param list errors: A list the reasons why hooks are skipped are added to.
+        :returns: The list of hook expressions which can launch the file, in the
+                  same order.
+        """
+        if not launch_hooks:
+            return launch_hooks
+        try:
+            path = self.resolve_publish_path(published_file)
+        except (PublishPathNotDefinedError, PublishPathNotSupported) as e:
+            self.logger.debug("Cannot resolve path of %s: %s" % (published_file, e))
+            path = None
+
+        def can_launch(launch_hook_expr):
+            try:
+                return bool(hook_instances[launch_hook_expr].can_launch(published_file, path))
+            except Exception as e:
+                # Let the hook execution decide.
+                self.logger.debug(
+                    "Failed to check if %s can launch %s: %s" % (launch_hook_expr, path, e),
+                    exc_info=True
+                )
+                return True
+
+        start = time.time()
+        with self.measure("can_launch"):
+            results = self._run_launch_hook_checks(can_launch, launch_hooks)
+        self.logger.debug("Checked launch hooks for %s in %.3fs: %s" % (
+            path, time.time() - start, dict(zip(launch_hooks, results))
+        ))
+        for launch_hook_expr, result in zip(launch_hooks, results):
+            if not result:
+                errors.append("%s cannot launch %s." % (launch_hook_expr, path))
+        return [launch_hook_expr for launch_hook_expr, result in zip(launch_hooks, results) if result]
+
+    def _run_launch_hook_checks(self, can_launch, launch_hooks):
+        """
+        Run the given check for each launch hook on a thread pool.
+
+        :param can_launch: A callable accepting a hook expression.
+        :param list launch_hooks: The launch hook expressions.
+        :returns: A list of results, in the same order as the hooks.
+        """
+        pool = ThreadPool(max(1, min(len(launch_hooks), self.get_setting("check_launch_hooks_workers"))))
+        try:
+            return pool.map(can_launch, launch_hooks)
+        finally:
+            pool.close()
+
+    def resolve_publish_path(self, sg_publish_data):
+        """
+        Return the local path of the given published file.
+
+        If the on-disk resolution cache is enabled, paths are stored for the
+        `updated_at` value of the published file and reused until it changes.
+
+        :param dict sg_publish_data: A published file entity dict.
+        :returns: A local path.
+        :raises: PublishPathNotDefinedError, PublishPathNotSupported
+        """
+        with self.measure("get_publish_path"):
+            cache = self.resolution_cache
+            if cache is None:
+                return resolve_publish_path(self.sgtk, sg_publish_data)
+            path = cache.get_publish_path(sg_publish_data)
+            if path is None:
+                path = resolve_publish_path(self.sgtk, sg_publish_data)
+                if path:
+                    cache.set_publish_path(sg_publish_data, path)
+            return path
+
+    def get_sequence_launch_mode(self, hook_instance):
+        """
+        Return how image sequences are passed to the given launch hook.
+
+        :param hook_instance: A launch hook instance.
+        :returns: `pattern`, `first_frame` or `range`.
+        """
+        modes = self.get_setting("sequence_launch_modes") or {}
+        launch_hook_expr = self._get_launch_hook_expression(hook_instance)
+        if launch_hook_expr in modes:
+            return modes[launch_hook_expr]
+        return self.get_setting("sequence_launch_mode")
+
+    def get_launch_readiness_timeout(self, hook_instance):
+        """
+        Return how long processes started by the given launch hook are watched
+        for an early exit, when they keep running.
+
+        :param hook_instance: A launch hook instance.
+        :returns: A number of seconds.
+        """
+        timeouts = self.get_setting("launch_readiness_timeouts") or {}
+        launch_hook_expr = self._get_launch_hook_expression(hook_instance)
+        if launch_hook_expr in timeouts:
+            return timeouts[launch_hook_expr]
+        return self.get_setting("launch_readiness_timeout")
+
+    def _get_launch_hook_expression(self, hook_instance):
+        """
+        Return the expression the given launch hook is configured with.
+
+        :param hook_instance: A launch hook instance.
+        :returns: A hook expression from `launch_publish_hooks`, or None.
+        """
+        for launch_hook_expr, instance in self._launch_hook_instances.items():
+            if instance is hook_instance:
+                return launch_hook_expr
+        return None
+
+    def _get_config_version(self):
+        """
+        Return a string identifying the current pipeline configuration and its
+        version.
+
+        :returns: A string.
+        """
+        descriptor = getattr(self.sgtk, "configuration_descriptor", None)
+        return "%s@%s" % (
+            self.sgtk.pipeline_configuration.get_path(),
+            descriptor.version if descriptor is not None else None
+        )
+
+    def _get_published_file_extension(self, published_file):
+        """
+        Return the extension of the given published file, without resolving
+        its local path.
+
+        :param dict published_file: A published file entity dict.
+        :returns: A lower case extension, possibly empty.
+        """
+        path = published_file.get("path") or {}
+        file_name = path.get("local_path") or path.get("name") or path.get("url") or ""
+        return os.path.splitext(file_name)[1].lower()
+
+
+class _NullSpan(object):
+    """
+    A context manager doing nothing, used when no launch is in progress.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class BatchLaunchError(TankError):
+    """
+    Raised by :meth:`BaseHook.execute_batch` when only some of the published
+    files were launched, so the other ones are launched one by one.
+    """
+
+    def __init__(self, message, launched):
+        """
+        :param str message: The error message.
+        :param list launched: The published file entity dicts which were
+                              launched before the error.
+        """
+        super(BatchLaunchError, self).__init__(message)
+        self.launched = launched
 
 
 class BaseHook(Hook):
     """
     A base hook used to share common functionality for all hooks.
     """
-    PUBLISHED_FILE_FIELDS = ["project", "path", "task", "entity"]
+    PUBLISHED_FILE_FIELDS = ["project", "path", "task", "entity", "updated_at"]
+    # Raised by execute_batch implementations which launched some of the files.
+    BatchLaunchError = BatchLaunchError
+
+    def get_publish_path(self, sg_publish_data):
+        """
+        Return the local path of the given published file.
+
+        Paths are resolved by the app, which can cache them, see
+        :meth:`LaunchPublish.resolve_publish_path`.
+
+        :param dict sg_publish_data: A published file entity dict.
+        :returns: A local path.
+        :raises: PublishPathNotDefinedError, PublishPathNotSupported
+        """
+        return self.parent.resolve_publish_path(sg_publish_data)
+
+    def get_launch_path(self, published_file, publish_path=None):
+        """
+        Return the path the given published file should be launched with.
+
+        If the staging cache is enabled, this is the path of a local copy of
+        the published file, copied if needed. Otherwise, or if the file can't
+        be staged, this is the publish path. Image sequences are then passed as
+        configured for this hook, see :meth:`get_sequence_launch_path`.
+
+        :param dict published_file: A published file entity dict.
+        :param str publish_path: The publish path, if already resolved.
+        :returns: A local path.
+        :raises: PublishPathNotDefinedError, PublishPathNotSupported
+        """
+        if publish_path is None:
+            publish_path = self.get_publish_path(published_file)
+        launch_path = publish_path
+        staging_cache = self.parent.staging_cache
+        if staging_cache is not None:
+            try:
+                with self.measure("staging"):
+                    launch_path = staging_cache.stage(publish_path)
+            except (IOError, OSError) as e:
+                self.logger.warning("Failed to stage %s, launching it from its publish path: %s" % (
+                    publish_path, e
+                ))
+                self.logger.debug("Failed to stage %s: %s" % (publish_path, e), exc_info=True)
+        return self.get_sequence_launch_path(launch_path)
+
+    def get_sequence_launch_path(self, path):
+        """
+        Return the path an image sequence should be passed to this hook with,
+        according to the `sequence_launch_mode` and `sequence_launch_modes`
+        settings.
+
+        Paths which are not image sequences, and sequences without any frame on
+        disk, are returned as they are.
+
+        :param str path: A path, possibly with a frame pattern.
+        :returns: The path with its frame pattern, the path of the first frame,
+                  or a path for the frame range.
+        """
+        mode = self.parent.get_sequence_launch_mode(self)
+        if mode not in ("first_frame", "range"):
+            return path
+        with self.measure("sequence_scan"):
+            sequence = self.parent.sequence_scanner.scan(path)
+        if sequence is None:
+            return path
+        if mode == "first_frame":
+            return sequence.get_frame_path(sequence.first)
+        return sequence.format_range(self.parent.get_setting("sequence_range_template"))
+
+    def can_launch(self, published_file, path):
+        """
+        Return whether this hook can launch the given published file.
+
+        This is called before `execute`, possibly concurrently with other hooks,
+        so implementations must be fast and have no side effect. This default
+        implementation always returns True.
+
+        :param dict published_file: The published file entity dict to launch.
+        :param str path: The local path of the published file, or None if it
+                         could not be resolved.
+        :rtype: bool
+        """
+        return True
+
+    def can_launch_batch(self, published_files):
+        """
+        Return whether this hook can launch all the given published files at
+        once, see :meth:`execute_batch`.
+
+        This default implementation returns False, published files are launched
+        one by one.
+
+        :param list published_files: The published file entity dicts to launch.
+        :rtype: bool
+        """
+        return False
+
+    def execute_batch(self, published_files, **kwargs):
+        """
+        Launch all the given published files at once.
+
+        Only called if :meth:`can_launch_batch` returned True.
+
+        Hooks returning True from :meth:`can_launch_batch` must implement it.
+        Implementations which can fail after launching some of the files, e.g.
+        with one process per group of files, must raise :class:`BatchLaunchError`
+        with the launched files, so they are not launched again.
+
+        :param list published_files: The published file entity dicts to launch.
+        :raises: :class:`BatchLaunchError` if some of the published files were
+            launched, the other ones are then launched one by one. Any other
+            error if none was launched, they are all launched one by one.
+            `TankError` if this method was not implemented.
+        """
+        raise TankError(
+            "%s can't launch published files at once: hooks returning True from "
+            "can_launch_batch must implement execute_batch." % self.__class__.__name__
+        )
+
+    def measure(self, phase):
+        """
+        Return a context manager measuring the time spent in a phase of the
+        current launch, reported in the launch metrics.
+
+        :param str phase: The name of the phase.
+        :returns: A context manager.
+        """
+        return self.parent.measure(phase)
+
+    def commit_launch(self):
+        """
+        Check that this launch was not cancelled, before doing something which
+        can't be undone, e.g. starting an application or changing context.
+
+        A hook which times out is cancelled, and the next launch hook is
+        tried. Once this method returned, the timeout does not apply anymore
+        and the app waits for the hook to complete, so a file is never
+        launched twice. :meth:`launch_process` calls it.
+
+        :raises: :class:`WatchdogTimeout` if the hook timed out.
+        """
+        self.parent.commit_launch()
+
+    def launch_process(self, args, hands_off=False):
+        """
+        Start a process detached from the current one, without a shell.
+
+        Launchers handing the file over to another application, e.g. open or
+        xdg-open, are waited for until they exit, up to `launch_handoff_timeout`,
+        so their exit code is reported. Otherwise, the call returns once the
+        process has been running for its readiness window, see
+        `launch_readiness_timeout`.
+
+        :param list args: The program to run followed by its arguments.
+        :param bool hands_off: Whether the program hands the file over to
+                               another application and exits.
+        :returns: A :class:`subprocess.Popen` instance.
+        :raises: `TankError` if the process can't be started or exits early
+                 with an error, :class:`WatchdogTimeout` if the hook timed out.
+        """
+        self.commit_launch()
+        with self.measure("spawn"):
+            return self.parent.process_launcher.launch(
+                args,
+                hands_off=hands_off,
+                readiness_timeout=self.parent.get_launch_readiness_timeout(self)
+            )
 
     def get_published_file(self, published_file_type, published_file_id):
         """
         Return the PublishedFile or TankPublishedFile with path, task and entity
         fields.
 
+        Published files are cached by the app, a cached published file is
+        returned without querying Shotgun.
+
         :param str published_file_type: PublishedFile or TankPublishedFile
         :param int published_file_id: a Shotgun ID.
         :returns: the published file with the right fields.
         """
-        return self.parent.shotgun.find_one(
-            published_file_type,
-            [["id", "is", published_file_id]],
-            self.PUBLISHED_FILE_FIELDS
-        )
+        cache = self.parent.published_file_cache
+        published_file = cache.get((published_file_type, published_file_id))
+        if published_file:
+            return published_file
+        with self.measure("get_published_file"):
+            published_file = self.parent.shotgun.find_one(
+                published_file_type,
+                [["id", "is", published_file_id]],
+                self.PUBLISHED_FILE_FIELDS
+            )
+        if published_file:
+            cache.set((published_file_type, published_file_id), published_file)
+        return published_file
+
+    def get_published_files(self, published_file_type, published_files):
+        """
+        Return the given PublishedFiles or TankPublishedFiles with path, task
+        and entity fields.
+
+        Published files which already have all the required fields, typically
+        because they were prefetched by the app, are returned as they are. The
+        others are retrieved from the app cache or, if not cached, with a single
+        Shotgun request.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile
+        :param list published_files: A list of published file entity dicts.
+        :returns: A list of published files with the right fields, in the same
+                  order as the given ones. Published files which can't be
+                  retrieved are omitted.
+        """
+        cache = self.parent.published_file_cache
+        found = {}
+        missing_ids = []
+        for published_file in published_files:
+            if all(field in published_file for field in self.PUBLISHED_FILE_FIELDS):
+                continue
+            cached = cache.get((published_file_type, published_file["id"]))
+            if cached:
+                found[published_file["id"]] = cached
+            else:
+                missing_ids.append(published_file["id"])
+        if not found and not missing_ids:
+            return list(published_files)
+        if missing_ids:
+            with self.measure("get_published_file"):
+                sg_published_files = self.parent.shotgun.find(
+                    published_file_type,
+                    [["id", "in", missing_ids]],
+                    self.PUBLISHED_FILE_FIELDS
+                )
+            for published_file in sg_published_files:
+                cache.set((published_file_type, published_file["id"]), published_file)
+                found[published_file["id"]] = published_file
+        result = []
+        for published_file in published_files:
+            if published_file["id"] in found:
+                result.append(found[published_file["id"]])
+            elif all(field in published_file for field in self.PUBLISHED_FILE_FIELDS):
+                result.append(published_file)
+        return result
@@ -0,0 +1,147 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compare the previous nested scan used to pick a published file by extension
+with the single pass selection of `ExtensionRanking`.
+
+Path resolution is simulated by a function which mimics the storage root
+lookups of `get_publish_path`, and counts how many times it is called.
+
+Usage::
+
+    python benchmarks/bench_extension_ranking.py
+"""
+
+import os
+import sys
+import timeit
+
+# The extensions module does not depend on Toolkit, import it directly so the
+# benchmark can run without a Toolkit core.
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "python", "tk_shotgun_launchpublish"
+))
+
+from extensions import ExtensionRanking  # noqa: E402
+
+# A typical viewer configuration.
+VALID_EXTENSIONS = [
+    "exr", "dpx", "cin", "tif", "tiff", "jpg", "jpeg", "png", "tga", "psd",
+    "hdr", "sgi", "rgb", "bmp", "gif", "webm", "mp4", "avi", "mxf", "mov",
+]
+
+STORAGE_ROOTS = dict(("storage_%d" % i, "/mnt/storage_%d" % i) for i in range(20))
+
+
+class InvalidPath(Exception):
+    pass
+
+
+class PathResolver(object):
+    """
+    Simulate `get_publish_path`, storage root lookup included.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, published_file):
+        self.calls += 1
+        path = published_file["path"]
+        if path is None:
+            raise InvalidPath()
+        storage = STORAGE_ROOTS[path["local_storage"]]
+        return os.path.normpath(os.path.join(storage, path["relative_path"]))
+
+
+def make_published_files(count):
+    """
+    Build published files linked to a Version: scenes and caches which can't
+    be opened in a viewer, a few invalid paths, and a review movie last.
+    """
+    extensions = ["abc", "usd", "ma", "fbx", "vdb", "bgeo.sc", "nk"]
+    published_files = []
+    for i in range(count - 1):
+        if i % 7 == 0:
+            path = None
+        else:
+            path = {
+                "local_storage": "storage_%d" % (i % 20),
+                "relative_path": "shots/sh%03d/publish/file_%d.v001.%s" % (i, i, extensions[i % len(extensions)]),
+            }
+        published_files.append({"type": "PublishedFile", "id": i, "path": path})
+    published_files.append({
+        "type": "PublishedFile",
+        "id": count,
+        "path": {"local_storage": "storage_0", "relative_path": "shots/sh000/review/review.v001.mov"},
+    })
+    return published_files
+
+
+def nested_scan(published_files, get_path):
+    """
+    The selection as it was implemented before `ExtensionRanking`.
+    """
+    for app_extension in VALID_EXTENSIONS:
+        for published_file in published_files:
+            try:
+                path_on_disk = get_path(published_file)
+                if path_on_disk and path_on_disk.endswith(".%s" % app_extension):
+                    return published_file
+            except InvalidPath:
+                pass
+    return None
+
+
+def single_pass(published_files, get_path, ranking):
+    """
+    The selection based on `ExtensionRanking`.
+    """
+    def get_valid_path(published_file):
+        try:
+            return get_path(published_file)
+        except InvalidPath:
+            return None
+    return ranking.select(published_files, get_valid_path)[0]
+
+
+def main():
+    ranking = ExtensionRanking(VALID_EXTENSIONS)
+    print("%8s %12s %12s %10s %10s %8s" % (
+        "files", "nested (us)", "single (us)", "nested #", "single #", "speedup"
+    ))
+    for count in (1, 10, 50, 200):
+        published_files = make_published_files(count)
+        nested_resolver = PathResolver()
+        single_resolver = PathResolver()
+        expected = nested_scan(published_files, nested_resolver)
+        result = single_pass(published_files, single_resolver, ranking)
+        assert result is expected, "Selections differ for %d files" % count
+
+        number = max(1, 2000 // count)
+        nested = min(timeit.repeat(
+            lambda: nested_scan(published_files, PathResolver()), number=number, repeat=5
+        )) / number
+        single = min(timeit.repeat(
+            lambda: single_pass(published_files, PathResolver(), ranking), number=number, repeat=5
+        )) / number
+        print("%8d %12.1f %12.1f %10d %10d %7.1fx" % (
+            count,
+            nested * 1e6,
+            single * 1e6,
+            nested_resolver.calls,
+            single_resolver.calls,
+            nested / single,
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Run `launch_publish` end to end against an in-memory Shotgun, and report for
+each scenario the wall time, the number of Shotgun requests and the peak
+memory allocated.
+
+Results are compared with the baselines checked in with the benchmark: the
+run fails if a scenario makes more Shotgun requests than its baseline, does
+not launch the expected number of files, or calls a Shotgun method the
+in-memory Shotgun does not implement. Request and launch counts don't depend
+on the machine, the in-memory Shotgun answers the same way on each run.
+
+Wall times depend on the machine, they are only checked against a baseline
+file recorded on the same machine, given with `--wall-time-baselines`: the run
+then also fails if a scenario takes longer than its baseline times the
+tolerance stored in that file, or given with `--tolerance`.
+
+Baselines are only written by running the suite with `--update-baselines`,
+wall times are then written to the `--wall-time-baselines` file, if given.
+
+The Toolkit core is required, the path to the `python` folder of a tk-core
+checkout can be given with the TK_CORE_PYTHON_PATH environment variable, or
+added to the PYTHONPATH.
+
+Usage::
+
+    TK_CORE_PYTHON_PATH=/path/to/tk-core/python python benchmarks/bench_launch_publish.py
+    python benchmarks/bench_launch_publish.py --scenario version_200 --repeat 20
+    python benchmarks/bench_launch_publish.py --update-baselines
+    python benchmarks/bench_launch_publish.py --wall-time-baselines ~/launch_publish_times.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+BASELINES_PATH = os.path.join(BENCHMARKS_FOLDER, "launch_publish_baselines.json")
+
+# The default factor wall times can exceed their baseline by.
+DEFAULT_TOLERANCE = 1.5
+
+if os.environ.get("TK_CORE_PYTHON_PATH"):
+    sys.path.insert(0, os.environ["TK_CORE_PYTHON_PATH"])
+
+
+def check_tk_core():
+    """
+    Skip the benchmark, exiting with a message, if the Toolkit core can't be
+    imported.
+    """
+    if importlib.util.find_spec("tank") is None:
+        print(
+            "SKIPPED: the Toolkit core is required to run these benchmarks, set "
+            "TK_CORE_PYTHON_PATH to the python folder of a tk-core checkout."
+        )
+        sys.exit(0)
+
+
+check_tk_core()
+
+sys.path.insert(0, BENCHMARKS_FOLDER)
+from launch_publish_harness import BenchApp, InMemoryShotgun  # noqa: E402
+
+# Settings shared by all scenarios, on top of the info.yml defaults.
+SETTINGS = {
+    "valid_extensions": ["ma", "nk", "exr", "mov"],
+}
+
+# Extensions of the published files linked to Versions, the best ranked one
+# last so all of them are ranked.
+VERSION_EXTENSIONS = ["jpg", "png", "abc", "mov"]
+
+
+def _create_published_file(sg, published_file_type, name, **fields):
+    """
+    Create a published file with a local path.
+    """
+    data = {
+        "code": name,
+        "path_cache": "project/%s" % name,
+        "path": {"local_path": "/mnt/project/%s" % name, "name": name},
+        "project": {"type": "Project", "id": 1},
+        "task": {"type": "Task", "id": 1},
+        "entity": {"type": "Shot", "id": 1},
+        "updated_at": "2019-01-01 00:00:00",
+    }
+    data.update(fields)
+    return sg.create(published_file_type, data)
+
+
+def published_file_scenario(launchapp=True, settings=None):
+    """
+    A single PublishedFile selected, opened with a launchapp.
+    """
+    def setup():
+        sg = InMemoryShotgun()
+        published_file = _create_published_file(sg, "PublishedFile", "scene.ma")
+        app = BenchApp(sg, dict(SETTINGS, **(settings or {})), launchapp=launchapp)
+        return app, "PublishedFile", [published_file["id"]]
+    return setup
+
+
+def version_scenario(published_file_count, published_file_type="PublishedFile"):
+    """
+    A Version selected, linked to the given number of published files.
+    """
+    def setup():
+        sg = InMemoryShotgun()
+        published_files = []
+        for i in range(published_file_count):
+            extension = VERSION_EXTENSIONS[max(0, i + len(VERSION_EXTENSIONS) - published_file_count)]
+            published_files.append(
+                _create_published_file(sg, published_file_type, "render_%03d.%s" % (i, extension))
+            )
+        link_field = "published_files" if published_file_type == "PublishedFile" else "tank_published_file"
+        version = sg.create("Version", {
+            link_field: [{"type": published_file_type, "id": pf["id"]} for pf in published_files],
+        })
+        for published_file in published_files:
+            sg.update(published_file_type, published_file["id"], {
+                "version": {"type": "Version", "id": version["id"]}
+            })
+        app = BenchApp(sg, SETTINGS, published_file_type=published_file_type)
+        return app, "Version", [version["id"]]
+    return setup
+
+
+SCENARIOS = {
+    "published_file": published_file_scenario(),
+    "published_file_no_launchapp": published_file_scenario(launchapp=False),
+    "published_file_configured_app": published_file_scenario(settings={"app_path_linux": "viewer"}),
+    "version_1": version_scenario(1),
+    "version_10": version_scenario(10),
+    "version_200": version_scenario(200),
+    "tank_published_file": version_scenario(10, "TankPublishedFile"),
+}
+
+
+def run_scenario(name, repeat):
+    """
+    Run a scenario the given number of times, each time with a new app so
+    in-memory caches are cold.
+
+    :returns: A dictionary of results.
+    """
+    durations = []
+    peaks = []
+    unsupported_calls = set()
+    record = None
+    for _ in range(repeat):
+        app, entity_type, entity_ids = SCENARIOS[name]()
+        tracemalloc.start()
+        start = time.time()
+        app.launch_publish(entity_type, entity_ids)
+        durations.append(time.time() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        record = app.reported_metrics[-1]
+        if app.errors:
+            print("%s: %s" % (name, "\n".join(app.errors)))
+        unsupported_calls.update(app.shotgun.unsupported_calls)
+    durations.sort()
+    return {
+        "shotgun_requests": record["shotgun"]["requests"],
+        "launched": record["launched"],
+        "wall_time": durations[len(durations) // 2],
+        "peak_memory": max(peaks),
+        "phases": record["phases"],
+        "unsupported_calls": sorted(unsupported_calls),
+    }
+
+
+def check_unsupported_calls(name, result):
+    """
+    Check that a scenario only called Shotgun methods implemented by the
+    in-memory Shotgun, its request count is meaningless otherwise.
+
+    :returns: A list of failure messages.
+    """
+    if not result["unsupported_calls"]:
+        return []
+    return ["%s called Shotgun methods not implemented by the benchmark: %s" % (
+        name, ", ".join(result["unsupported_calls"])
+    )]
+
+
+def check(name, result, baseline, wall_time_baseline, tolerance):
+    """
+    Compare a scenario result with its baselines.
+
+    :param dict baseline: The request and launch counts of the scenario.
+    :param float wall_time_baseline: The wall time of the scenario on this
+                                     machine, or None to not check it.
+    :param float tolerance: The factor wall times can exceed their baseline by.
+    :returns: A list of failure messages.
+    """
+    failures = check_unsupported_calls(name, result)
+    if baseline is None:
+        failures.append("%s has no baseline, run with --update-baselines" % name)
+        return failures
+    if result["shotgun_requests"] > baseline["shotgun_requests"]:
+        failures.append("%s made %d Shotgun requests, baseline is %d" % (
+            name, result["shotgun_requests"], baseline["shotgun_requests"]
+        ))
+    if result["launched"] != baseline["launched"]:
+        failures.append("%s launched %d files, expected %d" % (
+            name, result["launched"], baseline["launched"]
+        ))
+    if wall_time_baseline and tolerance and result["wall_time"] > wall_time_baseline * tolerance:
+        failures.append("%s took %.4fs, baseline is %.4fs" % (
+            name, result["wall_time"], wall_time_baseline
+        ))
+    return failures
+
+
+def load_json(path, default):
+    """
+    Return the content of a JSON file, or the given default if it does not
+    exist.
+    """
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    """
+    Write a JSON file, in a stable format so changes are easy to review.
+    """
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print("Baselines written to %s" % path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark launch_publish against an in-memory Shotgun.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenarios to run.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs per scenario.")
+    parser.add_argument(
+        "--wall-time-baselines",
+        default=None,
+        help="A file with the wall times recorded on this machine, to check wall times against."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=None,
+        help="Fail if a wall time exceeds its baseline times this factor, 0 to not check wall "
+             "times. Defaults to the tolerance stored with the wall time baselines."
+    )
+    parser.add_argument("--update-baselines", action="store_true", help="Write the results as new baselines.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args(argv)
+
+    baselines = load_json(BASELINES_PATH, {"scenarios": {}})
+    wall_time_baselines = {"tolerance": DEFAULT_TOLERANCE, "scenarios": {}}
+    if args.wall_time_baselines:
+        wall_time_baselines = load_json(args.wall_time_baselines, wall_time_baselines)
+    tolerance = wall_time_baselines["tolerance"] if args.tolerance is None else args.tolerance
+
+    results = {}
+    failures = []
+    for name in args.scenario or sorted(SCENARIOS):
+        result = run_scenario(name, max(1, args.repeat))
+        results[name] = result
+        if not args.json:
+            print("%-32s %3d requests %9.2fms %9.1fKiB peak" % (
+                name,
+                result["shotgun_requests"],
+                result["wall_time"] * 1000,
+                result["peak_memory"] / 1024.0,
+            ))
+        if args.update_baselines:
+            # Never record a baseline from a run missing requests.
+            failures.extend(check_unsupported_calls(name, result))
+        else:
+            failures.extend(check(
+                name,
+                result,
+                baselines["scenarios"].get(name),
+                wall_time_baselines["scenarios"].get(name) if args.wall_time_baselines else None,
+                tolerance
+            ))
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.update_baselines and not failures:
+        for name, result in results.items():
+            baselines["scenarios"][name] = {
+                "shotgun_requests": result["shotgun_requests"],
+                "launched": result["launched"],
+            }
+        write_json(BASELINES_PATH, baselines)
+        if args.wall_time_baselines:
+            if args.tolerance is not None:
+                wall_time_baselines["tolerance"] = args.tolerance
+            for name, result in results.items():
+                wall_time_baselines["scenarios"][name] = round(result["wall_time"], 6)
+            write_json(args.wall_time_baselines, wall_time_baselines)
+
+    for failure in failures:
+        print("FAILED: %s" % failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
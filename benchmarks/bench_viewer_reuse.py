@@ -0,0 +1,191 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Check that `reuse_app_instance` sends files to a running viewer instead of
+starting a new one, and compare the time taken by both.
+
+`open_with_configured_app` is run with the harness of `bench_launch_publish`,
+a stand-in viewer protocol and a stand-in viewer: a local TCP listener started
+in place of the viewer process, accepting paths as lines of JSON. The app,
+`ViewerRegistry` and the hook are the real ones, only the viewer and the
+protocol hook are stand-ins, so a studio protocol hook can be checked the same
+way against its viewer.
+
+The run fails if a file is not received by the running viewer, if a second
+viewer is started while one is running, or if no new viewer is started once
+the running one stopped responding.
+
+The Toolkit core is required, see `bench_launch_publish`.
+
+Usage::
+
+    TK_CORE_PYTHON_PATH=/path/to/tk-core/python python benchmarks/bench_viewer_reuse.py
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+if os.environ.get("TK_CORE_PYTHON_PATH"):
+    sys.path.insert(0, os.environ["TK_CORE_PYTHON_PATH"])
+
+sys.path.insert(0, BENCHMARKS_FOLDER)
+# Skips the benchmark if the Toolkit core can't be imported.
+from bench_launch_publish import SETTINGS, _create_published_file  # noqa: E402
+from launch_publish_harness import BenchApp, InMemoryShotgun  # noqa: E402
+
+SETTINGS = dict(SETTINGS, **{
+    "app_path_linux": "viewer",
+    "app_path_mac": "/Applications/Viewer.app",
+    "app_path_windows": "viewer.exe",
+    "launch_publish_hooks": ["{self}/open_with_configured_app.py"],
+    "reuse_app_instance": True,
+})
+
+
+class StandInViewer(object):
+    """
+    A viewer listening on a local port, recording the paths it is sent.
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.received = []
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("127.0.0.1", port))
+        self._server.listen(4)
+        # Accept times out so the thread can check whether it was stopped.
+        self._server.settimeout(0.05)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._serve, name="viewer-%d" % port)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._thread.join()
+        self._server.close()
+
+    def _serve(self):
+        while not self._stopped:
+            try:
+                connection, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            connection.settimeout(None)
+            try:
+                request = json.loads(connection.makefile("rb").readline().decode("utf-8"))
+                self.received.extend(request["paths"])
+                connection.sendall(b"ok\n")
+            finally:
+                connection.close()
+
+
+class StandInViewerProtocol(object):
+    """
+    A `hook_viewer_protocol` stand-in talking to :class:`StandInViewer`.
+    """
+
+    def get_launch_args(self, port):
+        return ["--port", str(port)]
+
+    def send_paths(self, port, paths, timeout):
+        try:
+            connection = socket.create_connection(("127.0.0.1", port), timeout)
+        except socket.error:
+            return False
+        try:
+            connection.sendall(json.dumps({"paths": list(paths)}).encode("utf-8") + b"\n")
+            return connection.makefile("rb").readline().strip() == b"ok"
+        except socket.error:
+            return False
+        finally:
+            connection.close()
+
+
+class StandInProcess(object):
+
+    def __init__(self, viewer):
+        self.viewer = viewer
+        # The registry checks whether the process is running, use one which is.
+        self.pid = os.getpid()
+
+
+class ViewerLauncher(object):
+    """
+    A process launcher starting a :class:`StandInViewer` instead of a process.
+    """
+
+    def __init__(self):
+        self.viewers = []
+
+    def launch(self, args, **kwargs):
+        viewer = StandInViewer(int(args[args.index("--port") + 1]))
+        self.viewers.append(viewer)
+        return StandInProcess(viewer)
+
+    def find_executable(self, name):
+        return name
+
+
+def launch(app, published_file_id):
+    """
+    Launch a published file and return the time it took.
+    """
+    start = time.time()
+    app.launch_publish("PublishedFile", [published_file_id])
+    return time.time() - start
+
+
+def main():
+    sg = InMemoryShotgun()
+    published_files = [
+        _create_published_file(sg, "PublishedFile", "plate_%d.mov" % i) for i in range(3)
+    ]
+    app = BenchApp(sg, SETTINGS, launchapp=False)
+    app.viewer_protocol = StandInViewerProtocol()
+    launcher = app.process_launcher = ViewerLauncher()
+    failures = []
+    try:
+        start_time = launch(app, published_files[0]["id"])
+        send_time = launch(app, published_files[1]["id"])
+        if len(launcher.viewers) != 1:
+            failures.append("%d viewers were started, expected 1" % len(launcher.viewers))
+        elif launcher.viewers[0].received != [published_files[1]["path"]["local_path"]]:
+            failures.append("The running viewer received %s" % launcher.viewers[0].received)
+
+        # A viewer which does not respond anymore is replaced.
+        launcher.viewers[0].stop()
+        restart_time = launch(app, published_files[2]["id"])
+        if len(launcher.viewers) != 2:
+            failures.append("No viewer was started after the running one stopped")
+        failures.extend(app.errors)
+    finally:
+        for viewer in launcher.viewers:
+            viewer.stop()
+        app.destroy_app()
+
+    print("%-32s %9.2fms" % ("start_viewer", start_time * 1000))
+    print("%-32s %9.2fms" % ("send_to_running_viewer", send_time * 1000))
+    print("%-32s %9.2fms" % ("replace_stopped_viewer", restart_time * 1000))
+    for failure in failures:
+        print("FAILED: %s" % failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+An offline harness running the app and its hooks without a Shotgun site or a
+running engine.
+
+The harness provides:
+
+- :class:`InMemoryShotgun`, a Shotgun stand-in supporting the queries made by
+  the app and its hooks.
+- Stub Toolkit API, pipeline configuration, context, environment and engine
+  objects.
+- :class:`BenchApp`, a :class:`LaunchPublish` subclass wired to these stubs,
+  with a process launcher which does not start anything.
+
+The Toolkit core must be importable, e.g. by adding the `python` folder of
+a tk-core checkout to the PYTHONPATH. Hooks are loaded with the core hook
+machinery, the real app and hook code is exercised.
+"""
+
+import copy
+import logging
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from tank import hook as tank_hook  # noqa: E402
+
+try:
+    from tank_vendor import yaml
+except ImportError:
+    import yaml
+
+
+def _load_app_module():
+    """
+    Load the app module from its file, as the engine would.
+    """
+    path = os.path.join(ROOT, "app.py")
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.load_source("tk_shotgun_launchpublish_app", path)
+    spec = importlib.util.spec_from_file_location("tk_shotgun_launchpublish_app", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+app_module = _load_app_module()
+
+
+def _resolve_local_path(tk, sg_publish_data):
+    """
+    Resolve the local path of a published file without storage roots.
+    """
+    return sg_publish_data["path"]["local_path"]
+
+
+# Published files created by the harness only have local paths, resolving
+# them does not need the storage roots of a site.
+app_module.resolve_publish_path = _resolve_local_path
+
+
+class InMemoryShotgun(object):
+    """
+    A minimal in-memory Shotgun stand-in.
+
+    Supports `find` and `find_one` with `is`, `in` and `ends_with` filters,
+    filter groups, ordering and limits, and `schema_field_read` returning the
+    fields of the stored entities.
+
+    Calling any other API method raises :class:`NotImplementedError` and is
+    recorded in :attr:`unsupported_calls`, so requests the app starts making
+    can't go unnoticed, even if the app catches the error.
+    """
+
+    def __init__(self):
+        self._entities = {}
+        self.unsupported_calls = []
+
+    def __getattr__(self, name):
+        # Only called for attributes which are not defined.
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def unsupported(*args, **kwargs):
+            self.unsupported_calls.append(name)
+            raise NotImplementedError("InMemoryShotgun does not implement %s" % name)
+        return unsupported
+
+    def create(self, entity_type, data):
+        """
+        Store an entity and return it.
+        """
+        entities = self._entities.setdefault(entity_type, {})
+        entity = dict(data)
+        entity["type"] = entity_type
+        entity.setdefault("id", len(entities) + 1)
+        entities[entity["id"]] = entity
+        return copy.deepcopy(entity)
+
+    def update(self, entity_type, entity_id, data):
+        """
+        Update the fields of an entity and return it.
+        """
+        entity = self._entities[entity_type][entity_id]
+        entity.update(data)
+        return copy.deepcopy(entity)
+
+    def find(self, entity_type, filters, fields=None, order=None, filter_operator=None, limit=0, **kwargs):
+        entities = [
+            entity for entity in self._entities.get(entity_type, {}).values()
+            if self._match_group({"filter_operator": filter_operator or "all", "filters": filters}, entity)
+        ]
+        for sort in reversed(order or [{"field_name": "id", "direction": "asc"}]):
+            entities.sort(
+                key=lambda entity: self._sort_key(entity.get(sort["field_name"])),
+                reverse=sort.get("direction") == "desc"
+            )
+        if limit:
+            entities = entities[:limit]
+        return [self._project(entity, fields or []) for entity in entities]
+
+    def find_one(self, entity_type, filters, fields=None, order=None, **kwargs):
+        result = self.find(entity_type, filters, fields, order=order, limit=1)
+        return result[0] if result else None
+
+    def schema_field_read(self, entity_type, field_name=None, project_entity=None):
+        fields = set(["type", "id"])
+        for entity in self._entities.get(entity_type, {}).values():
+            fields.update(entity.keys())
+        if field_name is not None:
+            fields &= set([field_name])
+        return dict((field, {"data_type": {"value": "text"}}) for field in fields)
+
+    def _project(self, entity, fields):
+        result = {"type": entity["type"], "id": entity["id"]}
+        for field in fields:
+            result[field] = copy.deepcopy(entity.get(field))
+        return result
+
+    def _sort_key(self, value):
+        if isinstance(value, dict):
+            return (value.get("type"), value.get("id"))
+        return value
+
+    def _match_group(self, group, entity):
+        results = (
+            self._match_group(item, entity) if isinstance(item, dict) else self._match(item, entity)
+            for item in group["filters"]
+        )
+        if group["filter_operator"] in ("any", "or"):
+            return any(results)
+        return all(results)
+
+    def _match(self, sg_filter, entity):
+        field, operator, value = sg_filter
+        actual = entity.get(field)
+        if operator == "is":
+            return self._same(actual, value)
+        if operator == "in":
+            return any(self._same(actual, candidate) for candidate in value)
+        if operator == "ends_with":
+            return isinstance(actual, str) and actual.endswith(value)
+        raise ValueError("Unsupported filter operator %s" % operator)
+
+    def _same(self, actual, value):
+        if isinstance(value, dict):
+            return isinstance(actual, dict) and (actual.get("type"), actual.get("id")) == (value["type"], value["id"])
+        return actual == value
+
+
+class StubContext(object):
+    """
+    A context with project, entity, step and task.
+    """
+
+    def __init__(self, project=None, entity=None, step=None, task=None):
+        self.project = project
+        self.entity = entity
+        self.step = step
+        self.task = task
+
+    def __eq__(self, other):
+        return isinstance(other, StubContext) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "<StubContext %s>" % (self.task or self.entity or self.project)
+
+
+class StubEnvironment(object):
+    """
+    An environment configuration, with or without a launchapp instance.
+    """
+
+    def __init__(self, engine_instance_name, launchapp):
+        self._engine_instance_name = engine_instance_name
+        self._launchapp = launchapp
+
+    def get_engines(self):
+        return [self._engine_instance_name]
+
+    def get_apps(self, engine_instance_name):
+        return ["tk-multi-launchapp"] if self._launchapp else []
+
+    def get_app_descriptor(self, engine_instance_name, app_instance_name):
+        return StubDescriptor(app_instance_name)
+
+
+class StubDescriptor(object):
+
+    def __init__(self, system_name, version="v1.0.0"):
+        self.system_name = system_name
+        self.version = version
+
+
+class StubPipelineConfiguration(object):
+
+    def __init__(self, root, published_file_type, launchapp):
+        self._root = root
+        self._published_file_type = published_file_type
+        self._launchapp = launchapp
+
+    def get_path(self):
+        return self._root
+
+    def get_published_file_entity_type(self):
+        return self._published_file_type
+
+    def get_schema_config_location(self):
+        return self._root
+
+    def get_environment(self, env_name, context=None):
+        return StubEnvironment("tk-shotgun", self._launchapp)
+
+
+class StubTk(object):
+    """
+    A Toolkit API stand-in, contexts are built from entity dictionaries.
+    """
+
+    def __init__(self, root, published_file_type, launchapp, shotgun):
+        self.shotgun = shotgun
+        self.pipeline_configuration = StubPipelineConfiguration(root, published_file_type, launchapp)
+        self.configuration_descriptor = StubDescriptor("tk-config-bench")
+        self.folders_created = 0
+
+    def execute_core_hook(self, hook_name, **kwargs):
+        return "shot_step"
+
+    def context_from_entity(self, entity_type, entity_id):
+        task = {"type": entity_type, "id": entity_id}
+        return StubContext(project={"type": "Project", "id": 1}, task=task, step={"type": "Step", "id": 1})
+
+    def context_from_entity_dictionary(self, entity):
+        return StubContext(project={"type": "Project", "id": 1}, entity=entity)
+
+    def context_from_path(self, path):
+        return StubContext()
+
+    def create_filesystem_structure(self, entity_type, entity_id, engine=None):
+        self.folders_created += 1
+        return 0
+
+
+class StubApp(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+class StubEngine(object):
+    """
+    A tk-shotgun engine stand-in, with optional launchapp commands.
+    """
+
+    instance_name = "tk-shotgun"
+    environment = {"name": "publishedfile_version"}
+
+    def __init__(self, launchapp_engines):
+        self.context = StubContext(project={"type": "Project", "id": 1})
+        self.apps = {}
+        self.commands = {}
+        self.launched = []
+        launchapp = StubApp("tk-multi-launchapp")
+        for engine_name in launchapp_engines:
+            self.commands["launch_%s" % engine_name] = {
+                "properties": {"app": launchapp, "engine_name": engine_name, "group_default": True},
+                "callback": self._launch,
+            }
+
+    def register_command(self, name, callback, properties):
+        pass
+
+    def _launch(self, file_to_open=None):
+        self.launched.append(file_to_open)
+
+
+class NoopProcessLauncher(object):
+    """
+    A process launcher recording launches instead of starting processes.
+    """
+
+    def __init__(self):
+        self.launched = []
+
+    def launch(self, args, **kwargs):
+        self.launched.append(args)
+
+    def find_executable(self, name):
+        return name
+
+
+class MetricsRecorder(object):
+    """
+    A launch metrics hook stand-in, recording the reported metrics.
+    """
+
+    def __init__(self, reported_metrics):
+        self._reported_metrics = reported_metrics
+
+    def execute(self, metrics, **kwargs):
+        self._reported_metrics.append(metrics)
+
+
+class BenchApp(app_module.LaunchPublish):
+    """
+    The app wired to the harness stand-ins.
+    """
+
+    def __init__(self, shotgun, settings, published_file_type="PublishedFile", launchapp=True):
+        self._sg = shotgun
+        self._cache_location = tempfile.mkdtemp(prefix="launchpublish-bench-")
+        self._tk = StubTk(self._cache_location, published_file_type, launchapp, shotgun)
+        self._engine = StubEngine(["tk-maya", "tk-nuke"] if launchapp else [])
+        self._settings = self._load_default_settings()
+        self._settings.update(settings)
+        self._logger = logging.getLogger("launchpublish.bench")
+        self.errors = []
+        self.reported_metrics = []
+        self.init_app()
+        self.process_launcher = NoopProcessLauncher()
+
+    @staticmethod
+    def _load_default_settings():
+        with open(os.path.join(ROOT, "info.yml")) as f:
+            configuration = yaml.safe_load(f)["configuration"]
+        settings = {}
+        for name, schema in configuration.items():
+            settings[name] = schema.get("default_value")
+        settings["display_name"] = "Launch Published File"
+        return settings
+
+    @property
+    def shotgun(self):
+        metrics = getattr(self, "_metrics", None)
+        if metrics is not None:
+            metrics.track_shotgun(self._sg)
+        return self._sg
+
+    @property
+    def sgtk(self):
+        return self._tk
+
+    tank = sgtk
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def logger(self):
+        return self._logger
+
+    @property
+    def cache_location(self):
+        return self._cache_location
+
+    @property
+    def disk_location(self):
+        return ROOT
+
+    def get_setting(self, key, default=None):
+        return self._settings.get(key, default)
+
+    def import_module(self, module_name):
+        python_folder = os.path.join(ROOT, "python")
+        if python_folder not in sys.path:
+            sys.path.insert(0, python_folder)
+        return __import__(module_name)
+
+    def create_hook_instance(self, hook_expression, base_class=None):
+        if not hook_expression.startswith("{"):
+            hook_expression = "{self}/%s.py" % hook_expression
+        path = hook_expression.replace("{self}", os.path.join(ROOT, "hooks"))
+        return tank_hook.create_hook_instance([path], self, base_class=base_class)
+
+    def execute_hook_method(self, key, method_name, base_class=None, **kwargs):
+        hook = self.create_hook_instance(self.get_setting(key), base_class=base_class)
+        return getattr(hook, method_name)(**kwargs)
+
+    def _create_hook_instances(self):
+        super(BenchApp, self)._create_hook_instances()
+        # Record the reported metrics instead of the default hook.
+        self._launch_metrics_hook = MetricsRecorder(self.reported_metrics)
+
+    def log_error(self, msg):
+        self.errors.append(msg)
+        self._logger.debug(msg)
+
+    def log_info(self, msg):
+        self._logger.debug(msg)
+
+    def log_warning(self, msg):
+        self._logger.debug(msg)
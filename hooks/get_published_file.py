@@ -34,7 +34,8 @@ class GetPublishedFile(HookBaseClass):
                containing only one element.
         :returns: The published file entity dict with the required fields.
         """
-        return self.get_published_file(published_file_type, published_files[0]["id"])
+        # call base Hook implementation method.
+        return self.get_published_files(published_file_type, published_files[:1])[0]
 
     def resolve_multiple_files(self, published_file_type, published_files):
         """
@@ -45,4 +46,5 @@ class GetPublishedFile(HookBaseClass):
         :param list published_files: The published files.
         :returns: The first published file entity dict with the required fields.
         """
-        return self.get_published_file(published_file_type, published_files[0]["id"])
+        # call base Hook implementation method.
+        return self.get_published_files(published_file_type, published_files[:1])[0]
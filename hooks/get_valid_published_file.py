@@ -47,13 +47,14 @@ class GetValidPublishedFile(HookBaseClass):
             raise TankError(
                 "Missing required value for setting 'valid_extensions'."
             )
-        sg_published_file = self.get_published_file(published_file_type, published_file["id"])
-        # call base Hook implementation method.
+        # call base Hook implementation methods.
+        sg_published_file = self.get_published_files(published_file_type, [published_file])[0]
         path_on_disk = self.get_publish_path(sg_published_file)
-        if path_on_disk:
-            for app_extension in valid_extensions:
-                if path_on_disk.endswith(".%s" % app_extension):
-                    return sg_published_file
+        if path_on_disk and self.parent.extension_ranking.get_rank(path_on_disk) is not None:
+            path_validator = self.parent.path_validator
+            if path_validator is not None and not path_validator.validate([path_on_disk])[0]:
+                raise TankError("PublishedFile path %s does not exist or can't be read" % path_on_disk)
+            return sg_published_file
         raise TankError("PublishedFile path %s does not match valid extensions %s" % (
             path_on_disk,
             valid_extensions
@@ -76,26 +77,59 @@ class GetValidPublishedFile(HookBaseClass):
             raise TankError(
                 "Missing required value for setting 'valid_extensions'."
             )
-        published_file_ids = [pf["id"] for pf in published_files]
-        published_files = self.parent.shotgun.find(
-            published_file_type,
-            [["id", "in", published_file_ids]],
-            self.PUBLISHED_FILE_FIELDS
-        )
-        for app_extension in valid_extensions:
-            for published_file in published_files:
-                try:
-                    # call base Hook implementation method.
-                    path_on_disk = self.get_publish_path(published_file)
-                    if path_on_disk and path_on_disk.endswith(".%s" % app_extension):
-                        return published_file
-                except (PublishPathNotDefinedError, PublishPathNotSupported):
-                    # if the path is invalid, just continue to the next
-                    # published file.
-                    pass
+        # call base Hook implementation method, published files prefetched
+        # by the app are not queried again.
+        published_files = self.get_published_files(published_file_type, published_files)
+        if self.parent.path_validator is not None:
+            published_file = self._select_existing_published_file(published_files)
+        else:
+            # Resolve each path once and keep the published file with the best
+            # ranked extension, the first one wins in case of a tie.
+            published_file, _ = self.parent.extension_ranking.select(
+                published_files,
+                self._get_valid_publish_path
+            )
+        if published_file:
+            return published_file
         raise TankError(
             "Could not find a published file matching valid extensions %s. Published files: %s" % (
                 valid_extensions,
                 published_files
             )
         )
+
+    def _select_existing_published_file(self, published_files):
+        """
+        Return the published file with the best ranked extension whose path
+        exists on disk.
+
+        All candidate paths are checked concurrently.
+
+        :param list published_files: A list of published file entity dicts.
+        :returns: A published file entity dict, or None.
+        """
+        candidates = self.parent.extension_ranking.sort(published_files, self._get_valid_publish_path)
+        with self.measure("validate_publish_paths"):
+            results = self.parent.path_validator.validate([path for _, path in candidates])
+        for (published_file, path), valid in zip(candidates, results):
+            if valid:
+                return published_file
+            self.logger.debug("Skipping %s, %s does not exist or can't be read" % (
+                published_file, path
+            ))
+        return None
+
+    def _get_valid_publish_path(self, published_file):
+        """
+        Return the path of the given published file, or None if it is invalid.
+
+        :param dict published_file: A published file entity dict.
+        :returns: A path or None.
+        """
+        try:
+            # call base Hook implementation method.
+            return self.get_publish_path(published_file)
+        except (PublishPathNotDefinedError, PublishPathNotSupported):
+            # if the path is invalid, just continue to the next
+            # published file.
+            return None
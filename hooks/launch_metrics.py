@@ -0,0 +1,43 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Hook receiving the metrics collected for each launch.
+
+The app already logs the metrics as a JSON line at debug level. Override this
+hook to send them to a metrics service, so latencies can be aggregated.
+"""
+
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class LaunchMetrics(HookBaseClass):
+
+    def execute(self, metrics, **kwargs):
+        """
+        Handle the metrics of a launch. This default implementation does nothing.
+
+        :param dict metrics: The launch metrics, with the following keys:
+               - entity_type: The type of the selected entities.
+               - entity_count: The number of selected entities.
+               - launched: The number of published files launched.
+               - failed: The number of entities which failed to launch.
+               - duration: The total duration, in seconds.
+               - phases: Timings of each phase, keyed by phase name, as
+                 dictionaries with `count` and `duration` keys.
+               - shotgun: The number of Shotgun `requests`, the estimated
+                 `response_bytes` and the number of requests per API method
+                 in `methods`. Requests made by the Toolkit core during the
+                 launch, e.g. to build contexts, create folders or change
+                 context, are included.
+        """
+        pass
@@ -23,6 +23,7 @@ to the app.
 """
 
 import os
+import shlex
 import sys
 import sgtk
 from tank import TankError
@@ -46,11 +47,86 @@ class LaunchApp(HookBaseClass):
         """
         # Will raise an error if the path is not defined or cannot be resolved
         # The app will take care of it.
-        # Calling the default Hook implementation method.
-        publish_path = self.get_publish_path(published_file)
+        # Calling the default Hook implementation method, which returns a
+        # local copy of the file if the staging cache is enabled.
+        publish_path = self.get_launch_path(published_file)
         self.logger.debug("Launching app for file %s" % publish_path)
         self._launch_app(publish_path)
 
+    def execute_batch(self, published_files, **kwargs):
+        """
+        Launch the defined application once for all the given published files,
+        e.g. to review them in a single viewer session.
+
+        Paths are passed to the application with the `app_batch_args` and
+        `app_batch_path_args` settings. If the command line would be too long,
+        the paths are split in several batches, with one process per batch.
+
+        :param list published_files: The published file entities to launch.
+        :raises: BatchLaunchError if a batch failed after others were launched,
+                 TankError, PublishPathNotDefinedError, PublishPathNotSupported
+        """
+        paths = [self.get_launch_path(published_file) for published_file in published_files]
+        app_path = self._get_app_path()
+        if not app_path:
+            raise TankError("Cannot find app path for platform '%s'." % sys.platform)
+        command = self._get_launch_command(app_path)
+        if self._send_to_app_instance(command, paths):
+            return
+        launched_count = 0
+        for batch in self._split_batches(command, paths):
+            try:
+                self._start_app(command, batch, self._get_batch_args(batch))
+            except Exception as e:
+                if not launched_count:
+                    raise
+                # Batches keep the order of the paths.
+                raise self.BatchLaunchError(
+                    "Launched %d of %d files: %s" % (launched_count, len(paths), e),
+                    published_files[:launched_count]
+                )
+            launched_count += len(batch)
+
+    def can_launch_batch(self, published_files):
+        """
+        Check that batch launches are enabled and that the app can be launched.
+
+        :param list published_files: The published file entity dicts to launch.
+        :rtype: bool
+        """
+        return bool(self.parent.get_setting("batch_launch")) and self.can_launch(None, None)
+
+    def can_launch(self, published_file, path):
+        """
+        Check that an app path is set for the current platform and that it
+        points to an existing app.
+
+        :param dict published_file: The published file entity dict to launch.
+        :param str path: The local path of the published file, or None.
+        :rtype: bool
+        """
+        app_path = self._get_app_path()
+        if not app_path:
+            return False
+        if sys.platform.startswith("linux"):
+            command = self._get_app_command(app_path)
+            return bool(command) and self.parent.process_launcher.find_executable(command[0]) is not None
+        # Mac apps are bundle folders.
+        return os.path.exists(app_path)
+
+    def _get_app_path(self):
+        """
+        Return the app path setting for the current platform.
+
+        :returns: A path, or None if not set or if the platform is not supported.
+        """
+        system = sys.platform
+        app_setting = {"darwin": "app_path_mac",
+                       "win32": "app_path_windows"}.get(system)
+        if system.startswith("linux"):
+            app_setting = "app_path_linux"
+        return self.parent.get_setting(app_setting) if app_setting else None
+
     def _launch_app(self, path):
         """
         Launches an app based on config settings.
@@ -63,30 +139,207 @@ class LaunchApp(HookBaseClass):
         """
         # get the setting
         system = sys.platform
-
-        app_setting = {"linux2": "app_path_linux",
-                       "darwin": "app_path_mac",
-                       "win32": "app_path_windows"}.get(system)
-        app_path = self.parent.get_setting(app_setting) if app_setting else None
+        app_path = self._get_app_path()
         if not app_path:
             raise TankError("Cannot find app path for platform '%s'." % system)
 
-        # run the app
-        if system.startswith("linux"):
-            cmd = '%s "%s" &' % (app_path, path)
-        elif system == "darwin":
-            cmd = 'open -n -a "%s" "%s"' % (app_path, path)
-        elif system == "win32":
-            cmd = 'start /B "Maya" "%s" "%s"' % (app_path, path)
-        else:
-            raise TankError("Platform '%s' is not supported." % system)
-
-        self.logger.debug("Executing launch command '%s'" % cmd)
-        exit_code = os.system(cmd)
-        if exit_code != 0:
+        # run the app, or send the file to a running instance
+        command = self._get_launch_command(app_path)
+        if self._send_to_app_instance(command, [path]):
+            return
+        try:
+            self._start_app(command, [path], [path])
+        except TankError as e:
             raise TankError("Failed to launch App! This is most likely because the path "
                           "to the app executable is not set to a correct value. The "
                           "current value is '%s' - please double check that this path "
                           "is valid and update as needed in this app's configuration. "
                           "If you have any questions, don't hesitate to contact support "
-                          "on support@shotgunsoftware.com." % app_path)
+                          "on support@shotgunsoftware.com. %s" % (app_path, e))
+
+    def _start_app(self, command, paths, file_args):
+        """
+        Start the app for the given paths.
+
+        If `reuse_app_instance` is enabled and the viewer protocol hook
+        supports the app, the app is started with a control port and
+        remembered, so next files can be sent to it.
+
+        :param list command: The command launching the app.
+        :param list paths: The paths opened by the app.
+        :param list file_args: The arguments passing the paths to the app.
+        :raises: `TankError` if the app failed to launch.
+        """
+        viewer_registry = self.parent.viewer_registry
+        port = None
+        control_args = []
+        if viewer_registry is not None:
+            port = viewer_registry.get_free_port()
+            control_args = self.parent.viewer_protocol.get_launch_args(port)
+            if control_args is None:
+                self.logger.debug(
+                    "hook_viewer_protocol does not support %s, not reusing it." % command
+                )
+                port = None
+                control_args = []
+            elif sys.platform == "darwin" and "--args" not in file_args:
+                # Arguments after --args are passed to the app by open.
+                control_args = ["--args"] + control_args
+        args = command + file_args + control_args
+        self.logger.debug("Executing launch command %s" % args)
+        # call base Hook implementation method. On Mac, open exits once the
+        # app is started.
+        process = self.launch_process(args, hands_off=sys.platform == "darwin")
+        if port is not None:
+            viewer_registry.register(
+                self._get_app_key(command),
+                process.pid if process is not None else None,
+                port
+            )
+
+    def _send_to_app_instance(self, command, paths):
+        """
+        Send the given paths to a running instance of the app started by this
+        hook, if `reuse_app_instance` is enabled.
+
+        Instances which don't respond are forgotten.
+
+        :param list command: The command launching the app.
+        :param list paths: The paths to open.
+        :returns: True if a running instance opened the paths.
+        """
+        viewer_registry = self.parent.viewer_registry
+        if viewer_registry is None:
+            return False
+        app_key = self._get_app_key(command)
+        timeout = self.parent.get_setting("app_instance_timeout")
+        instances = viewer_registry.get_instances(app_key)
+        if instances:
+            # call base Hook implementation method.
+            self.commit_launch()
+        for instance in instances:
+            with self.measure("send_to_app_instance"):
+                sent = self.parent.viewer_protocol.send_paths(instance["port"], paths, timeout)
+            if sent:
+                self.logger.debug("Sent %s to %s instance on port %d" % (paths, app_key, instance["port"]))
+                return True
+            self.logger.debug("%s instance on port %d did not respond" % (app_key, instance["port"]))
+            viewer_registry.unregister(app_key, instance["port"])
+        return False
+
+    def _get_app_key(self, command):
+        """
+        Return the key running instances of the app are remembered with.
+
+        :param list command: The command launching the app.
+        :returns: A string.
+        """
+        return " ".join(command)
+
+    def _get_launch_command(self, app_path):
+        """
+        Return the command launching the app for the current platform, without
+        the files to open.
+
+        :param str app_path: The app path setting value.
+        :returns: A list of arguments.
+        :raises: `TankError` if the platform is not supported.
+        """
+        system = sys.platform
+        if system.startswith("linux"):
+            return self._get_app_command(app_path)
+        elif system == "darwin":
+            return ["open", "-n", "-a", app_path]
+        elif system == "win32":
+            return [app_path]
+        raise TankError("Platform '%s' is not supported." % system)
+
+    def _get_batch_args(self, paths):
+        """
+        Return the arguments passing the given paths to the app, from the
+        `app_batch_args` and `app_batch_path_args` settings.
+
+        :param list paths: A list of paths.
+        :returns: A list of arguments.
+        """
+        path_templates = self.parent.get_setting("app_batch_path_args") or ["{path}"]
+        args = []
+        for template in self.parent.get_setting("app_batch_args") or ["{paths}"]:
+            if template == "{paths}":
+                for path in paths:
+                    args.extend(path_template.replace("{path}", path) for path_template in path_templates)
+            else:
+                args.append(template.replace("{count}", str(len(paths))))
+        return args
+
+    def _split_batches(self, command, paths):
+        """
+        Split the given paths in batches, so the command line of each batch is
+        not longer than the platform allows and has at most `app_batch_max_files`
+        paths.
+
+        :param list command: The command launching the app.
+        :param list paths: A list of paths.
+        :returns: A list of lists of paths.
+        """
+        max_length = self._get_max_command_length()
+        max_files = self.parent.get_setting("app_batch_max_files")
+        batch_args_length = self._get_command_length(self._get_batch_args([]))
+        fixed_length = self._get_command_length(command) + batch_args_length
+        batches = []
+        batch = []
+        length = fixed_length
+        for path in paths:
+            path_length = self._get_command_length(self._get_batch_args([path])) - batch_args_length
+            if batch and (length + path_length > max_length or (max_files and len(batch) >= max_files)):
+                batches.append(batch)
+                batch = []
+                length = fixed_length
+            batch.append(path)
+            length += path_length
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _get_max_command_length(self):
+        """
+        Return the maximum length of a command line for the current platform.
+
+        :returns: A number of characters.
+        """
+        max_length = self.parent.get_setting("app_batch_max_command_length")
+        if max_length:
+            return max_length
+        if sys.platform == "win32":
+            # CreateProcess limit, with some room for quoting.
+            return 32000
+        try:
+            # Leave room for the environment, which shares the same limit.
+            return os.sysconf("SC_ARG_MAX") // 2
+        except (AttributeError, ValueError, OSError):
+            return 65536
+
+    def _get_command_length(self, args):
+        """
+        Return the length of the command line for the given arguments,
+        including separators and quotes.
+
+        :param list args: A list of arguments.
+        :returns: A number of characters.
+        """
+        return sum(len(arg) + 3 for arg in args)
+
+    def _get_app_command(self, app_path):
+        """
+        Return the program and arguments for the given app path setting.
+
+        The setting was historically used unquoted in a shell command, so it
+        can contain arguments, e.g. `rv -fullscreen`, unless it is the path to
+        an existing file.
+
+        :param str app_path: The app path setting value.
+        :returns: A list of arguments.
+        """
+        if os.path.exists(app_path):
+            return [app_path]
+        return shlex.split(app_path)
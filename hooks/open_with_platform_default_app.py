@@ -25,6 +25,20 @@ class LaunchSystemApp(HookBaseClass):
     Hook for launching the default system app for a published file's path.
     """
 
+    def can_launch(self, published_file, path):
+        """
+        Check that the platform is supported and, on Linux, that xdg-open is
+        available.
+
+        :param dict published_file: The published file entity dict to launch.
+        :param str path: The local path of the published file, or None.
+        :rtype: bool
+        """
+        system = sys.platform
+        if system.startswith("linux"):
+            return self.parent.process_launcher.find_executable("xdg-open") is not None
+        return system in ("darwin", "win32")
+
     def execute(self, published_file, **kwargs):
         """
         Try to launch the default app defined by the operating
@@ -34,8 +48,9 @@ class LaunchSystemApp(HookBaseClass):
         :raises: `TankError` if it failed to launch an application.
         """
         # Will raise an error if the path is not defined or cannot be resolved.
-        # The app will take care of it.
-        publish_path = self.get_publish_path(published_file)
+        # The app will take care of it. A local copy of the file is returned
+        # if the staging cache is enabled.
+        publish_path = self.get_launch_path(published_file)
 
         self.logger.debug("Launching default system app for file %s" % publish_path)
 
@@ -43,16 +58,23 @@ class LaunchSystemApp(HookBaseClass):
         system = sys.platform
 
         # run the app
-        if system == "linux2":
-            cmd = 'xdg-open "%s"' % publish_path
+        if system == "win32":
+            # Let Windows pick the application associated with the file.
+            # call base Hook implementation method.
+            self.commit_launch()
+            try:
+                os.startfile(publish_path)
+            except OSError as e:
+                raise TankError("Failed to launch '%s': %s" % (publish_path, e))
+            return
+        if system.startswith("linux"):
+            args = ["xdg-open", publish_path]
         elif system == "darwin":
-            cmd = 'open "%s"' % publish_path
-        elif system == "win32":
-            cmd = 'cmd.exe /C start "file" "%s"' % publish_path
+            args = ["open", publish_path]
         else:
             raise TankError("Platform '%s' is not supported." % system)
 
-        self.logger.debug("Executing command '%s'" % cmd)
-        exit_code = os.system(cmd)
-        if exit_code != 0:
-            raise TankError("Failed to launch '%s'!" % cmd)
+        self.logger.debug("Executing command %s" % args)
+        # call base Hook implementation method, open and xdg-open exit once
+        # the file is handed over to the application.
+        self.launch_process(args, hands_off=True)
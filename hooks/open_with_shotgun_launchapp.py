@@ -13,14 +13,12 @@ Hook for launching the Shotgun app with its engine for a published file.
 
 This hook typically looks at the extension of the published file's path
 and based on this determine which launcher app to dispatch
-the request to.
+the request to. Launchers are defined by the `shotgun_launchers` setting.
 
 If no suitable launcher is found, raise an error, and the app
 will try other launch hooks, if provided.
 """
 
-import os
-
 import sgtk
 from sgtk import TankError
 
@@ -28,6 +26,16 @@ HookBaseClass = sgtk.get_hook_baseclass()
 
 
 class LaunchShotgunApp(HookBaseClass):
+    def can_launch(self, published_file, path):
+        """
+        Check that a launcher is registered for the published file extension.
+
+        :param dict published_file: The published file entity dict to launch.
+        :param str path: The local path of the published file, or None.
+        :rtype: bool
+        """
+        return bool(path) and self.parent.launcher_registry.get_launcher(path) is not None
+
     def execute(self, published_file, **kwargs):
         """
         Launches the associated app and starts tank.
@@ -39,10 +47,37 @@ class LaunchShotgunApp(HookBaseClass):
         # Example implementation below:
         path = self.get_publish_path(published_file)
 
+        # Fail fast, before resolving a context, if no launcher is registered
+        # for the extension.
+        launcher = self.parent.launcher_registry.get_launcher(path)
+        if launcher is None:
+            raise TankError("No valid Shotgun Launcher found for %s" % path)
+
+        with self.measure("context"):
+            context = self._get_context(published_file, path)
+        if context is None:
+            raise TankError("Failed to get a valid context from published file: %s" % published_file)
+        # The context is resolved from the publish path, the file is opened
+        # from its local copy if the staging cache is enabled.
+        path = self.get_launch_path(published_file, path)
+        self._do_launch(launcher.launch_app_instance_name, launcher.engine_name, path, context)
+
+    def _get_context(self, published_file, path):
+        """
+        Return a context for the given published file.
+
+        :param dict published_file: The published file entity dict to launch.
+        :param str path: The path of the published file.
+        :returns: A context or None.
+        """
+        # Contexts are cached by the app, files of the same task, entity or
+        # folder share them.
+        context_cache = self.parent.context_cache
+        context = None
         if published_file.get("task"):
-            context = self.tank.context_from_entity("Task", published_file["task"].get("id"))
+            context = context_cache.from_entity("Task", published_file["task"].get("id"))
         else:
-            context = self.tank.context_from_path(path)
+            context = context_cache.from_path(path)
             # In case the path is not relative to the project, or the project has no schema,
             # try to still get a relevant context from the entity or the project.
             # context_from_path calls tank.context.from_path which always returns a context, which at least contains the
@@ -50,37 +85,10 @@ class LaunchShotgunApp(HookBaseClass):
             # https://github.com/shotgunsoftware/tk-core/blob/a98bbec19446244f4cfed8895aa926e0a34668d4/python/tank/context.py#L1434
             if not context or not context.project:
                 if published_file.get("entity"):
-                    context = self.tank.context_from_entity_dictionary(published_file["entity"])
+                    context = context_cache.from_entity_dictionary(published_file["entity"])
                 elif published_file.get("project"):
-                    context = self.tank.context_from_entity_dictionary(published_file["project"])
-        if context is None:
-            raise TankError("Failed to get a valid context from published file: %s" % published_file)
-        if path.endswith(".nk"):
-            # nuke
-            self._do_launch("launchnuke", "tk-nuke", path, context)
-            return
-        elif path.endswith(".ma") or path.endswith(".mb"):
-            # maya
-            self._do_launch("launchmaya", "tk-maya", path, context)
-            return
-        elif path.endswith(".fbx"):
-            # Motionbuilder
-            self._do_launch("launchmotionbuilder", "tk-motionbuilder", path, context)
-            return
-        elif path.endswith(".hrox"):
-            # Hiero
-            self._do_launch("launchhiero", "tk-hiero", path, context)
-            return
-        elif path.endswith(".max"):
-            # 3ds Max
-            self._do_launch("launch3dsmax", "tk-3dsmaxplus", path, context)
-            return
-        elif os.path.splitext(path)[1] in [".psd", ".jpg", ".jpeg", ".png", ".tiff", ".tga"]:
-            # Photoshop
-            self._do_launch("launchphotoshop", "tk-photoshopcc", path, context)
-            return
-        # The extension is not valid. Return
-        raise TankError("No valid Shotgun Launcher found for %s" % path)
+                    context = context_cache.from_entity_dictionary(published_file["project"])
+        return context
 
     def _do_software_launcher_launch(self, path, engine_instance_name):
         """
@@ -93,37 +101,21 @@ class LaunchShotgunApp(HookBaseClass):
 
         :raises: RuntimeError when a usable launcher isn't found.
         """
-        engine = self.parent.engine
-        launchapp_system_name = "tk-multi-launchapp"
-
-        # The apps are keyed by app instance name. We don't actually care
-        # what the specific instance is called, as we just want some instance
-        # of tk-multi-launchapp. Because of that, we need to check more than
-        # just whether the name of the app is a key in the engine's apps
-        # property.
-        launchapp_commands = []
-
-        for command_name, command_data in engine.commands.iteritems():
-            props = command_data["properties"]
-            app = props.get("app")
-            if app is not None and app.name == launchapp_system_name:
-                if props.get("engine_name") == engine_instance_name:
-                    launchapp_commands.append(command_data)
-
-        if not launchapp_commands:
+        # The app keeps an index of launchapp commands, rebuilt only when the
+        # engine or its context changes.
+        launchapp_commands = self.parent.launchapp_commands
+        with self.measure("launcher_lookup"):
+            launch_callback = launchapp_commands.get_launch_callback(
+                self.parent.engine,
+                engine_instance_name
+            )
+        if launch_callback is None:
             raise RuntimeError(
-                "Unable to find an instance of %s currently running!" % launchapp_system_name
+                "Unable to find an instance of %s currently running!" % launchapp_commands.LAUNCHAPP_SYSTEM_NAME
             )
 
-        # Check to see if there's a group default. Use that if there is, and if
-        # there isn't then we take the first one off the top.
-        launch_callback = launchapp_commands[0]["callback"]
-
-        for command_data in launchapp_commands:
-            if command_data["properties"].get("group_default"):
-                launch_callback = command_data["callback"]
-                break
-
+        # call base Hook implementation method.
+        self.commit_launch()
         launch_callback(file_to_open=path)
 
     def _get_legacy_launch_command(self, launch_app_instance_name):
@@ -158,13 +150,18 @@ class LaunchShotgunApp(HookBaseClass):
         # maybe created at this point.
         # This can fail with different kinds of exceptions if the filesystem schema is not configured
         # correctly on the current projet. In this case, just continue.
+        # Folders already created for the entity and engine are not created again.
+        folder_creation = self.parent.folder_creation
         try:
-            if context.task:
-                self.parent.tank.create_filesystem_structure("Task", context.task["id"], engine_name)
-            elif context.entity:
-                self.parent.tank.create_filesystem_structure(context.entity["type"], context.entity["id"], engine_name)
-            elif context.project:
-                self.parent.tank.create_filesystem_structure("Project", context.project["id"], engine_name)
+            with self.measure("create_filesystem_structure"):
+                if context.task:
+                    folder_creation.create_filesystem_structure("Task", context.task["id"], engine_name)
+                elif context.entity:
+                    folder_creation.create_filesystem_structure(
+                        context.entity["type"], context.entity["id"], engine_name
+                    )
+                elif context.project:
+                    folder_creation.create_filesystem_structure("Project", context.project["id"], engine_name)
         except Exception as e:
             self.logger.warning("Cannot create filesystem structure (skipped): %s" % e)
             self.logger.debug("Cannot create filesystem structure: %s" % e, exc_info=True)
@@ -174,6 +171,8 @@ class LaunchShotgunApp(HookBaseClass):
         app_instance = self._get_legacy_launch_command(launch_app_instance_name)
 
         if app_instance is not None:
+            # call base Hook implementation method.
+            self.commit_launch()
             # now try to launch this via the tk-multi-launchapp
             try:
                 # use new method
@@ -221,7 +220,31 @@ class LaunchShotgunApp(HookBaseClass):
         # PublishedFile's specific environment into what it's linked to -- most likely
         # a Task context's shot_step or asset_step environment -- which will have a
         # launchapp instance configured for the tk-shotgun engine.
-        sgtk.platform.change_context(context)
+        #
+        # Changing context restarts the apps of the engine, which is slow. Check
+        # first whether the target environment has a launcher, without switching
+        # the running engine. Probe results are remembered by the app.
+        engine = self.parent.engine
+        env_name, has_launcher = self.parent.launcher_probe.get_environment(
+            engine, context, launch_app_instance_name, engine_name
+        )
+        if env_name is not None:
+            if not has_launcher:
+                raise TankError(
+                    "No launcher for %s in environment %s of context "
+                    "%r for file %s." % (engine_name, env_name, context, path)
+                )
+            if env_name == engine.environment.get("name") and context.project == engine.context.project:
+                # Launchers of this environment were already checked.
+                raise TankError(
+                    "Unable to find a suitable launcher in context "
+                    "%r for file %s." % (context, path)
+                )
+        # Changing context restarts the apps of the engine, don't do it if
+        # this launch was cancelled. call base Hook implementation method.
+        self.commit_launch()
+        with self.measure("change_context"):
+            sgtk.platform.change_context(context)
 
         # One last chance to find a legacy-style launcher.
         app_instance = self._get_legacy_launch_command(launch_app_instance_name)
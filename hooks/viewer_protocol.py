@@ -0,0 +1,55 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Hook used by `open_with_configured_app` to start the configured app with a
+control port, and to send files to a running instance, when the
+`reuse_app_instance` setting is True.
+
+Each viewer has its own command channel, e.g. RV network commands, so this
+default implementation does not support any: apps are started as usual and
+every file starts a new instance. Studios enabling `reuse_app_instance` must
+override this hook for the viewer they configured.
+`benchmarks/bench_viewer_reuse.py` runs `open_with_configured_app` with a
+stand-in protocol and viewer, and shows what an implementation must do.
+"""
+
+import sgtk
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class ViewerProtocol(HookBaseClass):
+    """
+    Start apps with a control port and send them files.
+    """
+
+    def get_launch_args(self, port):
+        """
+        Return the arguments to add to the app command so it listens for
+        commands on the given port.
+
+        :param int port: A local TCP port.
+        :returns: A list of arguments, or None if the app can't be controlled,
+                  in which case it is started as usual and not reused.
+        """
+        return None
+
+    def send_paths(self, port, paths, timeout):
+        """
+        Ask the app listening on the given port to open the given paths.
+
+        :param int port: The control port of the app.
+        :param list paths: A list of local paths.
+        :param float timeout: The number of seconds to wait for the app.
+        :returns: True if the app opened the paths, False if it is not
+                  listening or refused them.
+        """
+        return False
@@ -0,0 +1,29 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from .cache import LRUCache
+from .contexts import ContextCache
+from .daemon import LaunchDaemon, forward_launch, get_socket_path, is_daemon_supported
+from .extensions import ExtensionRanking
+from .failures import HookFailureRegistry
+from .folders import FolderCreationRegistry
+from .launchapp_commands import LaunchappCommandIndex
+from .launcher_probe import LauncherProbe
+from .launchers import Launcher, LauncherRegistry
+from .watchdog import WatchdogTimeout, commit_launch, run_with_timeout
+from .metrics import LaunchMetrics
+from .persistent_cache import ResolutionCache
+from .process import ProcessLauncher
+from .resolver import PublishedFileResolver
+from .schema import SchemaCache
+from .sequences import FrameSequence, SequenceScanner
+from .staging import StagingCache
+from .validation import PathValidator
+from .viewers import ViewerRegistry
@@ -0,0 +1,105 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+A bounded in-memory cache with time based expiration and least recently used
+eviction.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A cache keeping at most `max_size` entries, each of them valid for `ttl`
+    seconds.
+
+    When the cache is full, the least recently used entry is evicted. A ttl
+    or a max size of 0 disables the cache.
+    """
+
+    def __init__(self, max_size, ttl):
+        """
+        :param int max_size: The maximum number of entries to keep.
+        :param float ttl: The number of seconds an entry is valid for.
+        """
+        self._max_size = max(0, max_size)
+        self._ttl = max(0, ttl)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        """
+        Whether this cache stores anything.
+
+        :rtype: bool
+        """
+        return bool(self._max_size and self._ttl)
+
+    def get(self, key):
+        """
+        Return the value cached for the given key.
+
+        :param key: A hashable key.
+        :returns: The cached value, or None if the key is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < time.time():
+                self.misses += 1
+                return None
+            # Re-insert the entry to mark it as the most recently used.
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """
+        Cache the given value for the given key.
+
+        :param key: A hashable key.
+        :param value: The value to cache.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + self._ttl, value)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """
+        Remove the given key from the cache, or all keys if None.
+
+        :param key: A hashable key or None.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "<%s %d/%d entries, %d hits, %d misses>" % (
+            self.__class__.__name__,
+            len(self._entries),
+            self._max_size,
+            self.hits,
+            self.misses
+        )
@@ -0,0 +1,165 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Remember the contexts built for published files, so launching files from the
+same task, entity or folder does not build the same context again.
+"""
+
+import os
+import time
+
+from .cache import LRUCache
+
+
+class ContextCache(object):
+    """
+    Contexts keyed by task id, entity, or folder of the path they were built
+    from, each of them valid for a limited time.
+
+    Contexts can be serialized in the on-disk cache, so they are shared by all
+    the processes launching published files. Stored contexts are only valid
+    for the configuration they were built with.
+    """
+
+    _NAMESPACE = "contexts"
+
+    def __init__(self, tk, logger, max_size, ttl, config_version, persistent_cache=None):
+        """
+        :param tk: A Toolkit API instance.
+        :param logger: A standard logger.
+        :param int max_size: The maximum number of contexts kept in memory.
+        :param float ttl: The number of seconds a context is valid for. 0
+                          disables the cache.
+        :param str config_version: A string identifying the configuration, so
+                                   stored contexts are ignored when it changes.
+        :param persistent_cache: An optional :class:`ResolutionCache` where
+                                 serialized contexts are stored.
+        """
+        self._tk = tk
+        self._logger = logger
+        self._ttl = ttl
+        self._config_version = config_version
+        self._persistent_cache = persistent_cache
+        self._contexts = LRUCache(max_size, ttl)
+
+    def from_entity(self, entity_type, entity_id):
+        """
+        Return a context for the given entity, see `Sgtk.context_from_entity`.
+
+        :param str entity_type: A Shotgun entity type.
+        :param int entity_id: A Shotgun id.
+        :returns: A context.
+        """
+        return self._get(
+            "entity|%s|%s" % (entity_type, entity_id),
+            lambda: self._tk.context_from_entity(entity_type, entity_id)
+        )
+
+    def from_entity_dictionary(self, entity):
+        """
+        Return a context for the given entity dictionary, see
+        `Sgtk.context_from_entity_dictionary`.
+
+        :param dict entity: A Shotgun entity dict with type and id keys.
+        :returns: A context.
+        """
+        return self._get(
+            "entity|%s|%s" % (entity["type"], entity["id"]),
+            lambda: self._tk.context_from_entity_dictionary(entity)
+        )
+
+    def from_path(self, path):
+        """
+        Return a context for the given path, see `Sgtk.context_from_path`.
+
+        Contexts are shared by all the files of a folder.
+
+        :param str path: A local path.
+        :returns: A context.
+        """
+        return self._get(
+            "path|%s" % os.path.dirname(os.path.normpath(path)),
+            lambda: self._tk.context_from_path(path)
+        )
+
+    def invalidate(self):
+        """
+        Forget all contexts.
+        """
+        self._contexts.invalidate()
+        if self._persistent_cache is not None:
+            self._persistent_cache.delete_values(self._NAMESPACE)
+
+    def _get(self, key, build):
+        """
+        Return the context stored with the given key, or build and store it.
+
+        :param str key: The key of the context.
+        :param build: A callable returning a context.
+        :returns: A context.
+        """
+        if not self._contexts.enabled:
+            return build()
+        context = self._contexts.get(key)
+        if context is not None:
+            return context
+        context = self._get_stored(key)
+        if context is None:
+            start = time.time()
+            context = build()
+            self._logger.debug("Built context %r in %.3fs" % (context, time.time() - start))
+            if context is None:
+                return None
+            self._store(key, context)
+        self._contexts.set(key, context)
+        return context
+
+    def _get_stored(self, key):
+        """
+        Return the context stored on disk with the given key, if still valid.
+
+        :returns: A context or None.
+        """
+        if self._persistent_cache is None:
+            return None
+        stored_key = "%s|%s" % (self._config_version, key)
+        stored = self._persistent_cache.get_value(self._NAMESPACE, stored_key)
+        if stored is None:
+            return None
+        if stored["expires_at"] < time.time():
+            self._persistent_cache.delete_value(self._NAMESPACE, stored_key)
+            return None
+        try:
+            from sgtk import Context
+            return Context.deserialize(stored["context"])
+        except Exception as e:
+            self._logger.debug("Failed to deserialize context %s: %s" % (key, e), exc_info=True)
+            self._persistent_cache.delete_value(self._NAMESPACE, stored_key)
+            return None
+
+    def _store(self, key, context):
+        """
+        Serialize the given context on disk.
+        """
+        if self._persistent_cache is None:
+            return
+        try:
+            # Never store credentials on disk.
+            serialized = context.serialize(with_user_credentials=False, use_json=True)
+        except Exception as e:
+            # Older cores can't serialize contexts as JSON.
+            self._logger.debug("Failed to serialize context %r: %s" % (context, e), exc_info=True)
+            return
+        self._persistent_cache.set_value(
+            self._NAMESPACE,
+            "%s|%s" % (self._config_version, key),
+            {"context": serialized, "expires_at": time.time() + self._ttl}
+        )
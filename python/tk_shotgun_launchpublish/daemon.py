@@ -0,0 +1,365 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+A resident launch service, so launching a published file does not need to
+bootstrap Toolkit and start an engine each time.
+
+The service runs in an engine with the app loaded and accepts launch requests
+on a Unix socket, only accessible by the current user. Requests and responses
+are single lines of JSON::
+
+    {"entity_type": "Version", "entity_ids": [1234]}
+    {"launched": 1, "failed": 0}
+
+This module only uses the standard library, so it can be run as a thin client
+instead of bootstrapping Toolkit, e.g. from a Shotgun action menu item. The
+request is forwarded to the service if it is running. Otherwise the command
+given after ``--`` is run in place of the client, usually the command which
+bootstraps Toolkit and launches in process::
+
+    python daemon.py --config /path/to/pipeline/config Version 1234 -- \
+        /path/to/pipeline/config/tank shotgun_launch_publish Version 1234
+
+Without a fallback command, the exit status is 0 if the service handled the
+request, 1 if it failed, and 2 if the service is not running.
+"""
+
+import errno
+import getpass
+import hashlib
+import json
+import logging
+import os
+import select
+import socket
+import stat
+import sys
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+# The maximum size of a request, in bytes.
+MAX_REQUEST_SIZE = 65536
+
+
+def is_daemon_supported():
+    """
+    Return whether the launch service is supported on this platform.
+
+    :rtype: bool
+    """
+    return hasattr(socket, "AF_UNIX")
+
+
+def get_socket_path(config_path=None):
+    """
+    Return the path of the socket of the service for the current user and
+    the given pipeline configuration.
+
+    The socket is in a folder only accessible by the current user, in the
+    user runtime folder if `XDG_RUNTIME_DIR` is set, in the temporary folder
+    otherwise.
+
+    :param str config_path: Path to the pipeline configuration, or None.
+    :returns: A path.
+    """
+    runtime_folder = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_folder and os.path.isdir(runtime_folder):
+        folder = os.path.join(runtime_folder, "tk-shotgun-launchpublish")
+    else:
+        folder = os.path.join(tempfile.gettempdir(), "tk-shotgun-launchpublish-%s" % getpass.getuser())
+    name = "launch"
+    if config_path:
+        name = "launch-%s" % hashlib.sha1(
+            os.path.normpath(config_path).encode("utf-8")
+        ).hexdigest()[:12]
+    return os.path.join(folder, "%s.sock" % name)
+
+
+def is_trusted_socket(socket_path):
+    """
+    Return whether the given socket and its folder are owned by the current
+    user, and the folder is only accessible by them, so a service started by
+    another user can't receive the launch requests.
+
+    :param str socket_path: The path of the socket of a service.
+    :rtype: bool
+    """
+    try:
+        _check_owner(os.path.dirname(socket_path), stat.S_ISDIR)
+        _check_owner(socket_path, stat.S_ISSOCK)
+    except (OSError, RuntimeError) as e:
+        logger.debug("Not using socket %s: %s" % (socket_path, e))
+        return False
+    return True
+
+
+def _check_owner(path, is_type):
+    """
+    Check that the given path is owned by the current user, is of the expected
+    type, and is not accessible by anybody else.
+
+    Symbolic links are not followed.
+
+    :param str path: A path.
+    :param is_type: A function from :mod:`stat` checking the type of a file
+                    from its mode, e.g. `stat.S_ISDIR`.
+    :raises: RuntimeError if the path can't be trusted, OSError if it does not
+             exist.
+    """
+    path_stat = os.lstat(path)
+    if not is_type(path_stat.st_mode):
+        raise RuntimeError("%s is not of the expected type" % path)
+    if path_stat.st_uid != os.getuid():
+        raise RuntimeError("%s is not owned by the current user" % path)
+    if path_stat.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise RuntimeError("%s is accessible by other users" % path)
+
+
+def is_listening(socket_path):
+    """
+    Return whether a service is listening on the given socket.
+
+    :param str socket_path: The path of the socket of the service.
+    :rtype: bool
+    """
+    if not is_daemon_supported() or not is_trusted_socket(socket_path):
+        return False
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(1.0)
+        client.connect(socket_path)
+        return True
+    except socket.error:
+        return False
+    finally:
+        client.close()
+
+
+def forward_launch(socket_path, entity_type, entity_ids, timeout=60.0):
+    """
+    Send a launch request to the service listening on the given socket.
+
+    :param str socket_path: The path of the socket of the service.
+    :param str entity_type: A Shotgun entity type.
+    :param list entity_ids: A list of Shotgun entity ids.
+    :param float timeout: The number of seconds to wait for the launch.
+    :returns: The response of the service, a dictionary, or None if the
+              service is not running, or its socket can't be trusted.
+    :raises: RuntimeError if the service failed to handle the request.
+    """
+    if not is_daemon_supported() or not is_trusted_socket(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(timeout)
+        try:
+            client.connect(socket_path)
+        except socket.error as e:
+            if e.errno in (errno.ENOENT, errno.ECONNREFUSED):
+                # A socket left by a service which is not running anymore.
+                return None
+            raise
+        request = {"entity_type": entity_type, "entity_ids": list(entity_ids)}
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        response = json.loads(_read_line(client).decode("utf-8"))
+    except (socket.error, ValueError) as e:
+        raise RuntimeError("Launch service on %s failed: %s" % (socket_path, e))
+    finally:
+        client.close()
+    if "error" in response:
+        raise RuntimeError("Launch service on %s failed: %s" % (socket_path, response["error"]))
+    return response
+
+
+class LaunchDaemon(object):
+    """
+    Accept launch requests on a Unix socket and handle them one at a time, in
+    the thread running :meth:`serve`.
+    """
+
+    def __init__(self, socket_path, handler, logger=logger):
+        """
+        :param str socket_path: The path of the socket to listen on.
+        :param handler: A callable accepting an entity type and a list of entity
+                        ids, returning a JSON serializable dictionary.
+        :param logger: A standard logger.
+        """
+        self._socket_path = socket_path
+        self._handler = handler
+        self._logger = logger
+        self._server = None
+        self._stopped = False
+
+    @property
+    def socket_path(self):
+        """
+        The path of the socket the service listens on.
+
+        :rtype: str
+        """
+        return self._socket_path
+
+    def serve(self, idle_timeout=0):
+        """
+        Listen for launch requests until :meth:`stop` is called, or no request
+        was received for the given time.
+
+        :param float idle_timeout: A number of seconds, 0 to serve forever.
+        :raises: RuntimeError if another service is already listening.
+        """
+        self._bind()
+        self._logger.info("Launch service listening on %s" % self._socket_path)
+        last_request = time.time()
+        try:
+            while not self._stopped:
+                readable, _, _ = select.select([self._server], [], [], 1.0)
+                if readable:
+                    connection, _ = self._server.accept()
+                    try:
+                        self._handle(connection)
+                    finally:
+                        connection.close()
+                    last_request = time.time()
+                elif idle_timeout and time.time() - last_request > idle_timeout:
+                    self._logger.info("Launch service idle for %ds, stopping." % idle_timeout)
+                    break
+        finally:
+            self._close()
+
+    def stop(self):
+        """
+        Stop serving after the request being handled, if any.
+        """
+        self._stopped = True
+
+    def _bind(self):
+        """
+        Create the socket, replacing a socket left by a service which is not
+        running anymore.
+        """
+        folder = os.path.dirname(self._socket_path)
+        if not os.path.lexists(folder):
+            os.makedirs(folder, 0o700)
+        # Never use a folder created by somebody else, it could be replaced.
+        _check_owner(folder, stat.S_ISDIR)
+        if os.path.lexists(self._socket_path):
+            if is_listening(self._socket_path):
+                raise RuntimeError("A launch service is already listening on %s" % self._socket_path)
+            os.remove(self._socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self._socket_path)
+        os.chmod(self._socket_path, 0o600)
+        server.listen(8)
+        self._server = server
+
+    def _close(self):
+        """
+        Close and remove the socket.
+        """
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        try:
+            os.remove(self._socket_path)
+        except OSError:
+            pass
+
+    def _handle(self, connection):
+        """
+        Read a request from the given connection, run it and send a response.
+        """
+        connection.settimeout(5.0)
+        try:
+            request = json.loads(_read_line(connection).decode("utf-8"))
+            entity_type = request["entity_type"]
+            entity_ids = [int(entity_id) for entity_id in request["entity_ids"]]
+        except (socket.error, ValueError, KeyError, TypeError) as e:
+            self._send(connection, {"error": "Invalid request: %s" % e})
+            return
+        start = time.time()
+        try:
+            response = self._handler(entity_type, entity_ids)
+        except Exception as e:
+            self._logger.debug("Launch request %s failed: %s" % (request, e), exc_info=True)
+            response = {"error": str(e)}
+        self._logger.debug("Handled launch request %s in %.3fs" % (request, time.time() - start))
+        self._send(connection, response)
+
+    def _send(self, connection, response):
+        """
+        Send a response, ignoring clients which went away.
+        """
+        try:
+            connection.sendall(json.dumps(response, default=str).encode("utf-8") + b"\n")
+        except socket.error as e:
+            self._logger.debug("Failed to send launch response: %s" % e)
+
+
+def _read_line(connection):
+    """
+    Read a line from the given socket.
+
+    :returns: The line, as bytes, without the line feed.
+    :raises: ValueError if the line is too long or the connection was closed.
+    """
+    data = b""
+    while b"\n" not in data:
+        chunk = connection.recv(4096)
+        if not chunk:
+            raise ValueError("Connection closed")
+        data += chunk
+        if len(data) > MAX_REQUEST_SIZE:
+            raise ValueError("Request too large")
+    return data.split(b"\n", 1)[0]
+
+
+def main(argv=None):
+    """
+    Forward a launch request to the launch service from the command line, or
+    run the fallback command given after ``--`` if the service is not running.
+    """
+    import argparse
+    if argv is None:
+        argv = sys.argv[1:]
+    fallback_command = []
+    if "--" in argv:
+        separator = argv.index("--")
+        argv, fallback_command = argv[:separator], argv[separator + 1:]
+    parser = argparse.ArgumentParser(
+        description="Forward a launch request to the launch publish service.",
+        epilog="Arguments after -- are a command run instead if the service is not running."
+    )
+    parser.add_argument("--config", default=None, help="Path to the pipeline configuration.")
+    parser.add_argument("--socket", default=None, help="Path to the socket of the service.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Number of seconds to wait for the launch.")
+    parser.add_argument("entity_type", help="The type of the selected entities.")
+    parser.add_argument("entity_ids", help="The ids of the selected entities, comma separated.")
+    args = parser.parse_args(argv)
+    socket_path = args.socket or get_socket_path(args.config)
+    entity_ids = [int(entity_id) for entity_id in args.entity_ids.split(",") if entity_id]
+    try:
+        response = forward_launch(socket_path, args.entity_type, entity_ids, args.timeout)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    if response is None:
+        if fallback_command:
+            # Replace this process, the fallback bootstraps Toolkit as usual.
+            os.execvp(fallback_command[0], fallback_command)
+        return 2
+    print("Launched %d, failed %d" % (response["launched"], response["failed"]))
+    return 1 if response["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Rank paths by their extension, following the order of a list of valid extensions.
+"""
+
+
+class ExtensionRanking(object):
+    """
+    Precomputed mapping of valid extensions to their rank.
+
+    A path matches an extension if it ends with a period followed by the
+    extension, the rank of a path is the lowest rank of all the extensions it
+    matches. Multi-part extensions, e.g. `bgeo.sc`, are supported.
+    """
+
+    def __init__(self, valid_extensions):
+        """
+        :param list valid_extensions: A list of extensions, without the leading
+                                      period, in order of preference.
+        """
+        self._ranks = {}
+        for rank, extension in enumerate(valid_extensions):
+            self._ranks.setdefault(extension, rank)
+        # The maximum number of period separated parts in an extension, which
+        # is the number of suffixes to check for a path.
+        self._max_parts = max([extension.count(".") + 1 for extension in self._ranks] or [0])
+
+    def __bool__(self):
+        return bool(self._ranks)
+
+    __nonzero__ = __bool__
+
+    def get_rank(self, path):
+        """
+        Return the rank of the given path.
+
+        :param str path: A file path.
+        :returns: An integer, lower is better, or None if the path does not
+                  match any extension.
+        """
+        best_rank = None
+        index = len(path)
+        for _ in range(self._max_parts):
+            index = path.rfind(".", 0, index)
+            if index < 0:
+                break
+            rank = self._ranks.get(path[index + 1:])
+            if rank is not None and (best_rank is None or rank < best_rank):
+                best_rank = rank
+        return best_rank
+
+    def select(self, items, get_path):
+        """
+        Return the item whose path has the best rank.
+
+        Each path is resolved only once. If several items have the same rank,
+        the first one is returned.
+
+        :param items: An iterable of items.
+        :param get_path: A callable returning the path of an item, or None if
+                         the item has no valid path.
+        :returns: A tuple with the best item and its path, or (None, None) if
+                  no item matched.
+        """
+        best = (None, None)
+        best_rank = None
+        for item in items:
+            path = get_path(item)
+            if not path:
+                continue
+            rank = self.get_rank(path)
+            if rank is not None and (best_rank is None or rank < best_rank):
+                best = (item, path)
+                best_rank = rank
+                if rank == 0:
+                    # Nothing can beat the first extension.
+                    break
+        return best
+
+    def sort(self, items, get_path):
+        """
+        Return the items whose path matches an extension, best ranked first.
+
+        Each path is resolved only once. Items with the same rank keep their
+        order.
+
+        :param items: An iterable of items.
+        :param get_path: A callable returning the path of an item, or None if
+                         the item has no valid path.
+        :returns: A list of (item, path) tuples.
+        """
+        ranked = []
+        for index, item in enumerate(items):
+            path = get_path(item)
+            if not path:
+                continue
+            rank = self.get_rank(path)
+            if rank is not None:
+                ranked.append((rank, index, item, path))
+        ranked.sort(key=lambda entry: entry[:2])
+        return [(item, path) for _, _, item, path in ranked]
@@ -0,0 +1,150 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Remember launch hooks which failed for a file extension, so they can be
+skipped for a while instead of failing again.
+"""
+
+import sys
+import time
+
+
+class HookFailureRegistry(object):
+    """
+    Launch hook failures keyed by hook expression, file extension, platform
+    and configuration version, each of them valid for a limited time.
+    """
+
+    _NAMESPACE = "hook_failures"
+
+    def __init__(self, ttl, config_version, persistent_cache=None):
+        """
+        :param float ttl: The number of seconds a failure is remembered for.
+                          0 disables the registry.
+        :param str config_version: A string identifying the configuration, so
+                                   failures are forgotten when it changes.
+        :param persistent_cache: An optional :class:`ResolutionCache` where
+                                 failures are stored.
+        """
+        self._ttl = ttl
+        self._config_version = config_version
+        self._persistent_cache = persistent_cache
+        self._failures = {}
+
+    @property
+    def enabled(self):
+        """
+        Whether failures are remembered.
+
+        :rtype: bool
+        """
+        return bool(self._ttl)
+
+    def is_failing(self, hook_expression, extension):
+        """
+        Return whether the given hook recently failed for the given extension.
+
+        :param str hook_expression: A launch hook expression.
+        :param str extension: A file extension.
+        :rtype: bool
+        """
+        if not self.enabled:
+            return False
+        key = self._get_key(hook_expression, extension)
+        failure = self._failures.get(key)
+        if failure is None and self._persistent_cache is not None:
+            failure = self._persistent_cache.get_value(self._NAMESPACE, key)
+        if failure is None:
+            return False
+        if failure["expires_at"] < time.time():
+            self._forget(key)
+            return False
+        self._failures[key] = failure
+        return True
+
+    def record_failure(self, hook_expression, extension, error):
+        """
+        Remember that the given hook failed for the given extension.
+
+        :param str hook_expression: A launch hook expression.
+        :param str extension: A file extension.
+        :param str error: A description of the failure.
+        """
+        if not self.enabled:
+            return
+        key = self._get_key(hook_expression, extension)
+        failure = {
+            "hook": hook_expression,
+            "extension": extension,
+            "error": error,
+            "expires_at": time.time() + self._ttl,
+        }
+        self._failures[key] = failure
+        if self._persistent_cache is not None:
+            self._persistent_cache.set_value(self._NAMESPACE, key, failure)
+
+    def record_success(self, hook_expression, extension):
+        """
+        Forget any failure of the given hook for the given extension.
+
+        :param str hook_expression: A launch hook expression.
+        :param str extension: A file extension.
+        """
+        if not self.enabled:
+            return
+        key = self._get_key(hook_expression, extension)
+        if key in self._failures or (
+            self._persistent_cache is not None
+            and self._persistent_cache.get_value(self._NAMESPACE, key) is not None
+        ):
+            self._forget(key)
+
+    def get_failures(self):
+        """
+        Return the failures currently remembered for this configuration.
+
+        :returns: A list of dictionaries with `hook`, `extension`, `error` and
+                  `expires_at` keys.
+        """
+        failures = {}
+        if self._persistent_cache is not None:
+            failures.update(self._persistent_cache.get_values(self._NAMESPACE))
+        failures.update(self._failures)
+        now = time.time()
+        prefix = "%s|" % self._config_version
+        return [
+            failure for key, failure in failures.items()
+            if key.startswith(prefix) and failure["expires_at"] >= now
+        ]
+
+    def reset(self):
+        """
+        Forget all failures.
+        """
+        self._failures.clear()
+        if self._persistent_cache is not None:
+            self._persistent_cache.delete_values(self._NAMESPACE)
+
+    def _forget(self, key):
+        """
+        Forget the failure stored with the given key.
+        """
+        self._failures.pop(key, None)
+        if self._persistent_cache is not None:
+            self._persistent_cache.delete_value(self._NAMESPACE, key)
+
+    def _get_key(self, hook_expression, extension):
+        """
+        Return the key a failure is stored with.
+
+        :returns: A string.
+        """
+        return "%s|%s|%s|%s" % (self._config_version, sys.platform, extension, hook_expression)
@@ -0,0 +1,112 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Remember the entities folders were created for, so folder creation is only
+done once for a given entity and engine.
+"""
+
+import os
+import time
+
+
+class FolderCreationRegistry(object):
+    """
+    Wrap `create_filesystem_structure` and skip it for entities whose folders
+    were already created.
+
+    Records are only valid for a given version of the pipeline configuration
+    and of its schema folder, so updating the configuration or changing the
+    schema creates folders again. :meth:`invalidate` can be used if folders
+    were removed, e.g. after resetting the path cache.
+    """
+
+    _NAMESPACE = "folder_creation"
+
+    def __init__(self, tk, logger, enabled=True, persistent_cache=None):
+        """
+        :param tk: A Toolkit API instance.
+        :param logger: A standard logger.
+        :param bool enabled: If False, folders are always created.
+        :param persistent_cache: An optional :class:`ResolutionCache` where
+                                 records are stored.
+        """
+        self._tk = tk
+        self._logger = logger
+        self._enabled = enabled
+        self._persistent_cache = persistent_cache
+        self._created = set()
+        self._version = None
+
+    def create_filesystem_structure(self, entity_type, entity_id, engine_name):
+        """
+        Create folders for the given entity, unless they were already created.
+
+        :param str entity_type: A Shotgun entity type.
+        :param int entity_id: A Shotgun id.
+        :param str engine_name: The name of the engine folders are created for.
+        :raises: Any error raised by the folder creation.
+        """
+        key = None
+        if self._enabled:
+            key = "%s|%s|%s|%s" % (self._get_version(), entity_type, entity_id, engine_name)
+            if key in self._created or (
+                self._persistent_cache is not None
+                and self._persistent_cache.get_value(self._NAMESPACE, key)
+            ):
+                self._created.add(key)
+                self._logger.debug(
+                    "Folders for %s %s (%s) were already created, skipping." % (
+                        entity_type, entity_id, engine_name
+                    )
+                )
+                return
+        start = time.time()
+        count = self._tk.create_filesystem_structure(entity_type, entity_id, engine_name)
+        self._logger.debug(
+            "Created folders for %s %s (%s) in %.3fs: %s items processed." % (
+                entity_type, entity_id, engine_name, time.time() - start, count
+            )
+        )
+        if key is not None:
+            self._created.add(key)
+            if self._persistent_cache is not None:
+                self._persistent_cache.set_value(self._NAMESPACE, key, True)
+
+    def invalidate(self):
+        """
+        Forget all the entities folders were created for.
+        """
+        self._created.clear()
+        self._version = None
+        if self._persistent_cache is not None:
+            self._persistent_cache.delete_values(self._NAMESPACE)
+
+    def _get_version(self):
+        """
+        Return a string identifying the current configuration and schema,
+        computed once per process.
+
+        :returns: A string.
+        """
+        if self._version is None:
+            pipeline_configuration = self._tk.pipeline_configuration
+            parts = [pipeline_configuration.get_path()]
+            descriptor = getattr(self._tk, "configuration_descriptor", None)
+            if descriptor is not None:
+                parts.append(str(descriptor.version))
+            # Adding or removing schema items changes the schema folder
+            # modification time.
+            try:
+                parts.append(str(os.path.getmtime(pipeline_configuration.get_schema_config_location())))
+            except OSError:
+                parts.append("")
+            self._version = "|".join(parts)
+        return self._version
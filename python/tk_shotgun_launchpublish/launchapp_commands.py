@@ -0,0 +1,92 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Index the commands registered by tk-multi-launchapp instances, by the name of
+the engine they launch.
+"""
+
+
+class LaunchappCommandIndex(object):
+    """
+    The launch callbacks of tk-multi-launchapp commands, keyed by engine name.
+
+    The index is built from the engine commands the first time it is needed,
+    and rebuilt only if the engine, its context or its commands changed.
+    """
+
+    LAUNCHAPP_SYSTEM_NAME = "tk-multi-launchapp"
+
+    def __init__(self):
+        self._engine = None
+        self._context = None
+        self._command_count = None
+        self._callbacks = {}
+
+    def get_launch_callback(self, engine, engine_name):
+        """
+        Return the launch callback for the given engine name.
+
+        If several tk-multi-launchapp commands launch the engine, the group
+        default is returned if there is one, the first one otherwise.
+
+        :param engine: The current engine.
+        :param str engine_name: The name of the engine to launch.
+        :returns: A callable accepting a `file_to_open` keyword argument, or
+                  None if no command is registered for the engine name.
+        """
+        if (
+            engine is not self._engine
+            or engine.context != self._context
+            or len(engine.commands) != self._command_count
+        ):
+            self._build(engine)
+        return self._callbacks.get(engine_name)
+
+    def invalidate(self):
+        """
+        Force the index to be rebuilt the next time it is used.
+        """
+        self._engine = None
+        self._context = None
+        self._command_count = None
+        self._callbacks = {}
+
+    def _build(self, engine):
+        """
+        Build the index from the given engine commands.
+
+        :param engine: The current engine.
+        """
+        # The apps are keyed by app instance name. We don't actually care
+        # what the specific instance is called, as we just want some instance
+        # of tk-multi-launchapp. Because of that, we need to check more than
+        # just whether the name of the app is a key in the engine's apps
+        # property.
+        callbacks = {}
+        group_defaults = set()
+        for command_data in engine.commands.values():
+            props = command_data["properties"]
+            app = props.get("app")
+            if app is None or app.name != self.LAUNCHAPP_SYSTEM_NAME:
+                continue
+            engine_name = props.get("engine_name")
+            if engine_name in group_defaults:
+                continue
+            # Use the group default if there is one, otherwise the first one.
+            if props.get("group_default"):
+                callbacks[engine_name] = command_data["callback"]
+                group_defaults.add(engine_name)
+            else:
+                callbacks.setdefault(engine_name, command_data["callback"])
+        self._callbacks = callbacks
+        self._engine = engine
+        self._context = engine.context
+        self._command_count = len(engine.commands)
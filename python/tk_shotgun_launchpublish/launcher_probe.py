@@ -0,0 +1,147 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Check whether the environment of a context provides a launcher for an engine,
+without changing the context of the running engine.
+
+Changing context restarts the apps of the engine, which is expensive. The probe
+reads the target environment configuration instead, and remembers its result for
+the configuration version, engine name, context entity type and step, optionally
+on disk. Environments without a launcher are only remembered for a limited time,
+so launchers added to the configuration are found again.
+"""
+
+import time
+
+
+class LauncherProbe(object):
+    """
+    Resolve the environment of a context and look for launcher apps in it.
+    """
+
+    LAUNCHAPP_SYSTEM_NAME = "tk-multi-launchapp"
+    _NAMESPACE = "launcher_probe"
+
+    def __init__(self, tk, logger, config_version, missing_launcher_ttl, persistent_cache=None):
+        """
+        :param tk: A Toolkit API instance.
+        :param logger: A standard logger.
+        :param str config_version: A string identifying the configuration, so
+                                   results are forgotten when it changes.
+        :param float missing_launcher_ttl: The number of seconds an environment
+                                           without a launcher is remembered for.
+        :param persistent_cache: An optional :class:`ResolutionCache` where
+                                 results are stored.
+        """
+        self._tk = tk
+        self._logger = logger
+        self._config_version = config_version
+        self._missing_launcher_ttl = missing_launcher_ttl
+        self._persistent_cache = persistent_cache
+        self._results = {}
+
+    def get_environment(self, engine, context, launch_app_instance_name, engine_name):
+        """
+        Return the name of the environment the given context resolves to, if it
+        has a launcher for the given engine name.
+
+        :param engine: The running engine.
+        :param context: The target context.
+        :param str launch_app_instance_name: The name of the legacy launcher, e.g.
+                                             launchmaya.
+        :param str engine_name: The name of the engine to launch.
+        :returns: A tuple with the environment name and whether it has a
+                  launcher. The environment name is None if it can't be resolved.
+        """
+        key = self._get_key(engine, context, engine_name)
+        result = self._results.get(key)
+        if result is None and self._persistent_cache is not None:
+            result = self._persistent_cache.get_value(self._NAMESPACE, key)
+        if result is not None and result["expires_at"] is not None and result["expires_at"] < time.time():
+            self._forget(key)
+            result = None
+        if result is None:
+            env_name, has_launcher = self._probe(engine, context, launch_app_instance_name)
+            if env_name is None:
+                # Don't remember failures to resolve the environment.
+                return env_name, has_launcher
+            if not has_launcher and not self._missing_launcher_ttl:
+                return env_name, has_launcher
+            result = {
+                "environment": env_name,
+                "has_launcher": has_launcher,
+                # Environments with a launcher only change with the
+                # configuration version, which is part of the key.
+                "expires_at": None if has_launcher else time.time() + self._missing_launcher_ttl,
+            }
+            if self._persistent_cache is not None:
+                self._persistent_cache.set_value(self._NAMESPACE, key, result)
+        self._results[key] = result
+        return result["environment"], result["has_launcher"]
+
+    def _forget(self, key):
+        """
+        Forget the result stored with the given key.
+        """
+        self._results.pop(key, None)
+        if self._persistent_cache is not None:
+            self._persistent_cache.delete_value(self._NAMESPACE, key)
+
+    def _get_key(self, engine, context, engine_name):
+        """
+        Return the key results are stored with.
+
+        :returns: A string.
+        """
+        if context.entity:
+            entity_type = context.entity["type"]
+        elif context.project:
+            entity_type = "Project"
+        else:
+            entity_type = None
+        step_id = context.step["id"] if context.step else None
+        return "%s|%s|%s|%s|%s" % (
+            self._config_version,
+            engine.instance_name,
+            engine_name,
+            entity_type,
+            step_id,
+        )
+
+    def _probe(self, engine, context, launch_app_instance_name):
+        """
+        Resolve the environment of the context and look for launchers.
+
+        :returns: A tuple with the environment name, or None, and whether it
+                  has a launcher.
+        """
+        try:
+            env_name = self._tk.execute_core_hook("pick_environment", context=context)
+            if not env_name:
+                return None, False
+            environment = self._tk.pipeline_configuration.get_environment(env_name, context)
+            if engine.instance_name not in environment.get_engines():
+                return env_name, False
+            legacy_names = (
+                "tk-shotgun-%s" % launch_app_instance_name,
+                "tk-multi-%s" % launch_app_instance_name,
+            )
+            for app_instance in environment.get_apps(engine.instance_name):
+                if app_instance in legacy_names:
+                    return env_name, True
+                descriptor = environment.get_app_descriptor(engine.instance_name, app_instance)
+                if descriptor.system_name == self.LAUNCHAPP_SYSTEM_NAME:
+                    return env_name, True
+            return env_name, False
+        except Exception as e:
+            # The probe is only an optimization, let the caller change context.
+            self._logger.debug("Failed to probe launchers for %s: %s" % (context, e), exc_info=True)
+            return None, False
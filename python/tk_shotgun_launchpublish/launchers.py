@@ -0,0 +1,77 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Map file extensions to the Shotgun launcher used to open them.
+"""
+
+from collections import namedtuple
+
+Launcher = namedtuple("Launcher", ["launch_app_instance_name", "engine_name"])
+
+
+class LauncherRegistry(object):
+    """
+    A registry of launchers, keyed by lower case extension.
+
+    Extensions are matched case insensitively, multi-part extensions, e.g.
+    `bgeo.sc`, are supported and take precedence over shorter ones.
+    """
+
+    def __init__(self, launchers):
+        """
+        :param list launchers: A list of dictionaries with `extensions`,
+                               `launch_app_instance_name` and `engine_name` keys,
+                               as defined by the `shotgun_launchers` setting.
+        """
+        self._launchers = {}
+        for launcher in launchers:
+            value = Launcher(launcher["launch_app_instance_name"], launcher["engine_name"])
+            for extension in launcher["extensions"]:
+                # The first definition of an extension wins.
+                self._launchers.setdefault(self.normalize_extension(extension), value)
+        self._max_parts = max([extension.count(".") + 1 for extension in self._launchers] or [0])
+
+    @staticmethod
+    def normalize_extension(extension):
+        """
+        Return the given extension in lower case without leading period.
+
+        :param str extension: An extension, e.g. `.MA` or `ma`.
+        :returns: A normalized extension, e.g. `ma`.
+        """
+        return extension.lstrip(".").lower()
+
+    def get_launcher(self, path):
+        """
+        Return the launcher to use for the given path.
+
+        :param str path: A file path.
+        :returns: A :class:`Launcher` or None if no launcher is registered for
+                  the path extension.
+        """
+        file_name = path.replace("\\", "/").rsplit("/", 1)[-1].lower()
+        # Find the start of the longest possible extension, then check
+        # extensions from the longest to the shortest.
+        starts = []
+        index = len(file_name)
+        for _ in range(self._max_parts):
+            index = file_name.rfind(".", 0, index)
+            if index < 0:
+                break
+            starts.append(index)
+        for index in reversed(starts):
+            launcher = self._launchers.get(file_name[index + 1:])
+            if launcher is not None:
+                return launcher
+        return None
+
+    def __contains__(self, path):
+        return self.get_launcher(path) is not None
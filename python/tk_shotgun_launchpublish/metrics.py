@@ -0,0 +1,183 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Collect timings and Shotgun usage for a launch, reported as a single record.
+"""
+
+import contextlib
+import json
+import threading
+import time
+
+# Shotgun API methods counted as requests.
+SHOTGUN_REQUEST_METHODS = frozenset([
+    "find", "find_one", "summarize", "text_search", "create", "update", "delete",
+    "revive", "batch", "upload", "download_attachment", "schema_read",
+    "schema_entity_read", "schema_field_read", "note_thread_read", "activity_stream_read",
+])
+
+# Marks request methods which were not set on a connection before tracking it.
+_NOT_SET = object()
+
+
+class LaunchMetrics(object):
+    """
+    Timings of the phases of a launch and the Shotgun requests it made.
+
+    Phases are measured with :meth:`span`, nested or repeated spans are all
+    recorded, the durations of a repeated phase are added up.
+
+    Shotgun requests are recorded for the connections given to
+    :meth:`track_shotgun`, until :meth:`stop_tracking` is called.
+    """
+
+    def __init__(self, entity_type, entity_ids):
+        """
+        :param str entity_type: The type of the entities being launched.
+        :param list entity_ids: The ids of the entities being launched.
+        """
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._phases = {}
+        self._requests = {}
+        self._request_count = 0
+        self._response_bytes = 0
+        self._entity_type = entity_type
+        self._entity_count = len(entity_ids)
+        self._tracked = []
+        # Requests made by a request, e.g. find_one calling find, are not
+        # recorded twice.
+        self._local = threading.local()
+        self.launched = 0
+        self.failed = 0
+
+    @contextlib.contextmanager
+    def span(self, phase):
+        """
+        Measure the time spent in the block.
+
+        :param str phase: The name of the phase.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - start
+            with self._lock:
+                phase_metrics = self._phases.setdefault(phase, {"count": 0, "duration": 0.0})
+                phase_metrics["count"] += 1
+                phase_metrics["duration"] += duration
+
+    def record_request(self, method, result):
+        """
+        Record a Shotgun request.
+
+        :param str method: The Shotgun API method name.
+        :param result: The value returned by the request, used to estimate the
+                       size of the response.
+        """
+        try:
+            size = len(json.dumps(result, default=str))
+        except (TypeError, ValueError):
+            size = 0
+        with self._lock:
+            self._request_count += 1
+            self._response_bytes += size
+            self._requests[method] = self._requests.get(method, 0) + 1
+
+    def track_shotgun(self, shotgun):
+        """
+        Record the requests made with the given Shotgun connection, until
+        :meth:`stop_tracking` is called.
+
+        The request methods of the connection object itself are replaced, so
+        requests the Toolkit core makes with it, e.g. to build contexts or
+        create folders, are recorded as well as the ones made by the app.
+        Tracking a connection again has no effect.
+
+        :param shotgun: A Shotgun API instance.
+        """
+        with self._lock:
+            if any(tracked is shotgun for tracked, _ in self._tracked):
+                return
+            previous = {}
+            for name in SHOTGUN_REQUEST_METHODS:
+                method = getattr(shotgun, name, None)
+                if not callable(method):
+                    continue
+                previous[name] = shotgun.__dict__.get(name, _NOT_SET)
+                setattr(shotgun, name, self._get_counted_method(name, method))
+            self._tracked.append((shotgun, previous))
+
+    def stop_tracking(self):
+        """
+        Restore the request methods of the tracked Shotgun connections.
+        """
+        with self._lock:
+            tracked, self._tracked = self._tracked, []
+        for shotgun, previous in tracked:
+            for name, method in previous.items():
+                if method is _NOT_SET:
+                    del shotgun.__dict__[name]
+                else:
+                    setattr(shotgun, name, method)
+
+    def as_dict(self):
+        """
+        Return the metrics as a JSON serializable dictionary.
+
+        :returns: A dictionary.
+        """
+        with self._lock:
+            return {
+                "entity_type": self._entity_type,
+                "entity_count": self._entity_count,
+                "launched": self.launched,
+                "failed": self.failed,
+                "duration": time.time() - self._start,
+                "phases": dict((name, dict(values)) for name, values in self._phases.items()),
+                "shotgun": {
+                    "requests": self._request_count,
+                    "response_bytes": self._response_bytes,
+                    "methods": dict(self._requests),
+                },
+            }
+
+    def to_json(self):
+        """
+        Return the metrics as a single line of JSON.
+
+        :returns: A string.
+        """
+        return json.dumps(self.as_dict(), sort_keys=True)
+
+    def _get_counted_method(self, name, method):
+        """
+        Return a function calling the given Shotgun API method and recording
+        the request.
+
+        :param str name: The Shotgun API method name.
+        :param method: The bound method.
+        :returns: A function.
+        """
+        def counted(*args, **kwargs):
+            if getattr(self._local, "in_request", False):
+                return method(*args, **kwargs)
+            self._local.in_request = True
+            try:
+                with self.span("shotgun.%s" % name):
+                    result = method(*args, **kwargs)
+            finally:
+                self._local.in_request = False
+            self.record_request(name, result)
+            return result
+        return counted
+
@@ -0,0 +1,344 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+An on-disk cache of resolution results, shared by all the processes launching
+published files.
+
+Each web action runs in its own process, so results are stored in a SQLite
+database. Published file records and publish paths are stored with the
+`updated_at` value of the published file they were resolved from, so a
+stale row can be detected with a cheap Shotgun request. Other resolution
+results are stored as JSON values, grouped by namespace.
+
+The cache can be pruned from the command line::
+
+    python persistent_cache.py /path/to/resolution_cache.sqlite --max-age 604800
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ResolutionCache(object):
+    """
+    A SQLite backed cache of published file records, publish paths and other
+    values.
+
+    SQLite errors are logged and otherwise ignored, the cache never prevents
+    a launch from happening.
+    """
+
+    _SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS published_files (
+            published_file_type TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            updated_at TEXT,
+            data TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            PRIMARY KEY (published_file_type, id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS publish_paths (
+            published_file_type TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            updated_at TEXT,
+            path TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            PRIMARY KEY (published_file_type, id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS "values" (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )""",
+    ]
+
+    _TABLES = ["published_files", "publish_paths", "values"]
+
+    def __init__(self, path):
+        """
+        :param str path: Full path to the SQLite database file. It is created
+                         if it does not exist.
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def path(self):
+        """
+        The path to the SQLite database file.
+
+        :rtype: str
+        """
+        return self._path
+
+    @staticmethod
+    def updated_at_key(sg_data):
+        """
+        Return a string suitable to compare the `updated_at` value of the given
+        Shotgun entity with a stored one.
+
+        :param dict sg_data: A Shotgun entity dict.
+        :returns: A string, or None if the entity has no `updated_at` value.
+        """
+        updated_at = sg_data.get("updated_at")
+        if updated_at is None:
+            return None
+        return str(updated_at)
+
+    def get_published_files(self, published_file_type, published_file_ids):
+        """
+        Return the stored published files for the given ids.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param list published_file_ids: A list of Shotgun ids.
+        :returns: A dictionary where keys are ids and values tuples of the stored
+                  `updated_at` key and the published file entity dict.
+        """
+        if not published_file_ids:
+            return {}
+        rows = self._execute(
+            "SELECT id, updated_at, data FROM published_files "
+            "WHERE published_file_type = ? AND id IN (%s)" % ",".join("?" * len(published_file_ids)),
+            [published_file_type] + list(published_file_ids),
+        )
+        return dict((row[0], (row[1], json.loads(row[2]))) for row in rows)
+
+    def set_published_files(self, published_file_type, published_files):
+        """
+        Store the given published files.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param list published_files: A list of published file entity dicts.
+        """
+        now = time.time()
+        self._execute_many(
+            "INSERT OR REPLACE INTO published_files VALUES (?, ?, ?, ?, ?)",
+            [(
+                published_file_type,
+                pf["id"],
+                self.updated_at_key(pf),
+                json.dumps(pf, default=str),
+                now
+            ) for pf in published_files]
+        )
+
+    def get_publish_path(self, sg_publish_data):
+        """
+        Return the stored publish path for the given published file, if it was
+        stored for the same `updated_at` value.
+
+        :param dict sg_publish_data: A published file entity dict.
+        :returns: A path or None.
+        """
+        rows = self._execute(
+            "SELECT updated_at, path FROM publish_paths WHERE published_file_type = ? AND id = ?",
+            (sg_publish_data["type"], sg_publish_data["id"]),
+        )
+        if rows and rows[0][0] is not None and rows[0][0] == self.updated_at_key(sg_publish_data):
+            return rows[0][1]
+        return None
+
+    def set_publish_path(self, sg_publish_data, path):
+        """
+        Store the publish path for the given published file.
+
+        :param dict sg_publish_data: A published file entity dict.
+        :param str path: The resolved publish path.
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO publish_paths VALUES (?, ?, ?, ?, ?)",
+            (
+                sg_publish_data["type"],
+                sg_publish_data["id"],
+                self.updated_at_key(sg_publish_data),
+                path,
+                time.time()
+            ),
+        )
+
+    def get_value(self, namespace, key):
+        """
+        Return the value stored for the given key.
+
+        :param str namespace: The namespace of the key.
+        :param str key: The key.
+        :returns: The stored value, or None.
+        """
+        rows = self._execute(
+            'SELECT value FROM "values" WHERE namespace = ? AND key = ?',
+            (namespace, key),
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_values(self, namespace):
+        """
+        Return all the values stored in the given namespace.
+
+        :param str namespace: The namespace.
+        :returns: A dictionary where keys are the stored keys.
+        """
+        rows = self._execute('SELECT key, value FROM "values" WHERE namespace = ?', (namespace,))
+        return dict((row[0], json.loads(row[1])) for row in rows)
+
+    def set_value(self, namespace, key, value):
+        """
+        Store a value for the given key.
+
+        :param str namespace: The namespace of the key.
+        :param str key: The key.
+        :param value: A JSON serializable value.
+        """
+        self._execute(
+            'INSERT OR REPLACE INTO "values" VALUES (?, ?, ?, ?)',
+            (namespace, key, json.dumps(value), time.time()),
+        )
+
+    def delete_value(self, namespace, key):
+        """
+        Remove the value stored for the given key.
+
+        :param str namespace: The namespace of the key.
+        :param str key: The key.
+        """
+        self._execute('DELETE FROM "values" WHERE namespace = ? AND key = ?', (namespace, key))
+
+    def delete_values(self, namespace):
+        """
+        Remove all the values stored in the given namespace.
+
+        :param str namespace: The namespace to clear.
+        """
+        self._execute('DELETE FROM "values" WHERE namespace = ?', (namespace,))
+
+    def prune(self, max_age=None):
+        """
+        Remove entries older than the given age, or all entries.
+
+        :param float max_age: A number of seconds, or None to remove all entries.
+        :returns: The number of removed entries.
+        """
+        removed = 0
+        for table in self._TABLES:
+            if max_age is None:
+                removed += self._execute_count('DELETE FROM "%s"' % table, ())
+            else:
+                removed += self._execute_count(
+                    'DELETE FROM "%s" WHERE stored_at < ?' % table,
+                    (time.time() - max_age,)
+                )
+        return removed
+
+    def close(self):
+        """
+        Close the connection to the database, if any.
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self):
+        """
+        Return a connection to the database, creating it if needed.
+
+        Must be called with the lock held.
+
+        :returns: A :class:`sqlite3.Connection`.
+        """
+        if self._connection is None:
+            folder = os.path.dirname(self._path)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+            # Several processes can use the database at the same time, wait a
+            # bit for locks to be released instead of failing straight away.
+            connection = sqlite3.connect(self._path, timeout=5, check_same_thread=False)
+            for statement in self._SCHEMA:
+                connection.execute(statement)
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, statement, parameters):
+        """
+        Execute the given statement and return the fetched rows.
+
+        :returns: A list of rows, empty if the statement failed.
+        """
+        with self._lock:
+            try:
+                connection = self._connect()
+                rows = connection.execute(statement, parameters).fetchall()
+                connection.commit()
+                return rows
+            except (sqlite3.Error, OSError, IOError) as e:
+                logger.warning("Resolution cache %s: %s" % (self._path, e))
+                return []
+
+    def _execute_many(self, statement, parameters):
+        """
+        Execute the given statement for each set of parameters.
+        """
+        if not parameters:
+            return
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.executemany(statement, parameters)
+                connection.commit()
+            except (sqlite3.Error, OSError, IOError) as e:
+                logger.warning("Resolution cache %s: %s" % (self._path, e))
+
+    def _execute_count(self, statement, parameters):
+        """
+        Execute the given statement and return the number of affected rows.
+        """
+        with self._lock:
+            try:
+                connection = self._connect()
+                count = connection.execute(statement, parameters).rowcount
+                connection.commit()
+                return count
+            except (sqlite3.Error, OSError, IOError) as e:
+                logger.warning("Resolution cache %s: %s" % (self._path, e))
+                return 0
+
+
+def main(argv=None):
+    """
+    Prune a resolution cache from the command line.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="Prune a launch publish resolution cache.")
+    parser.add_argument("path", help="Path to the SQLite database file.")
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=None,
+        help="Remove entries older than this number of seconds. All entries are removed if not set."
+    )
+    args = parser.parse_args(argv)
+    cache = ResolutionCache(args.path)
+    removed = cache.prune(args.max_age)
+    cache.close()
+    print("Removed %d entries from %s" % (removed, args.path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Start applications in processes detached from the current one, without
+going through a shell.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from tank import TankError
+
+# Windows process creation flags, not exposed by the subprocess module in
+# Python 2.
+DETACHED_PROCESS = 0x00000008
+CREATE_NEW_PROCESS_GROUP = 0x00000200
+
+
+class ProcessLauncher(object):
+    """
+    Start detached processes and report their failures.
+
+    Launchers handing the file over to another application, e.g. open or
+    xdg-open, are waited for until they exit, so their exit code tells whether
+    the file could be opened, up to a hand-off timeout.
+
+    Applications which keep running are only watched for a short readiness
+    window: if they exit with an error during that window, the launch is
+    considered as failed. A process which is still running is waited for
+    during the whole window, so the window adds to the latency of each launch
+    and should stay short.
+
+    Past the timeout or the window, the process is left running and reaped in
+    the background, a later exit with an error is only logged.
+    """
+
+    def __init__(self, logger, readiness_timeout=0.2, handoff_timeout=10.0):
+        """
+        :param logger: A standard logger.
+        :param float readiness_timeout: The number of seconds a process is
+                                        watched for an early exit, 0 to only
+                                        check it once after starting it.
+        :param float handoff_timeout: The maximum number of seconds to wait for
+                                      a launcher handing the file over to exit.
+        """
+        self._logger = logger
+        self._readiness_timeout = readiness_timeout
+        self._handoff_timeout = handoff_timeout
+
+    def launch(self, args, hands_off=False, readiness_timeout=None):
+        """
+        Start a process with the given arguments.
+
+        :param list args: The program to run followed by its arguments.
+        :param bool hands_off: Whether the program hands the file over to
+                               another application and exits, in which case
+                               its exit is waited for.
+        :param float readiness_timeout: The readiness window of this process,
+                                        if it keeps running, the default one
+                                        if None.
+        :returns: The :class:`subprocess.Popen` instance.
+        :raises: `TankError` if the process can't be started, or exits with a
+                 non zero code before the hand-off timeout or during the
+                 readiness window.
+        """
+        self._logger.debug("Starting process %s" % args)
+        devnull = open(os.devnull, "r+b")
+        try:
+            process = subprocess.Popen(args, **self._get_popen_kwargs(devnull))
+        except (OSError, ValueError) as e:
+            raise TankError("Failed to start %s: %s" % (args[0], e))
+        finally:
+            # The child has its own copy of the handle.
+            devnull.close()
+
+        if hands_off:
+            timeout = self._handoff_timeout
+        elif readiness_timeout is None:
+            timeout = self._readiness_timeout
+        else:
+            timeout = readiness_timeout
+        deadline = time.time() + timeout
+        while True:
+            exit_code = process.poll()
+            if exit_code is not None:
+                if exit_code != 0:
+                    raise TankError("%s exited with code %d." % (args[0], exit_code))
+                return process
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(min(0.01, remaining))
+
+        if hands_off:
+            self._logger.debug(
+                "%s did not exit after %.1fs, assuming the file was opened." % (args[0], timeout)
+            )
+
+        # The process is alive, wait for it in the background so it does not
+        # become a zombie if it exits before the current process.
+        reaper = threading.Thread(target=self._reap, args=(process, args[0]), name="reap-%d" % process.pid)
+        reaper.daemon = True
+        reaper.start()
+        return process
+
+    def _reap(self, process, name):
+        """
+        Wait for the given process and log its exit with an error, if any.
+
+        :param process: A :class:`subprocess.Popen` instance.
+        :param str name: The program the process runs.
+        """
+        exit_code = process.wait()
+        if exit_code:
+            self._logger.warning("%s exited with code %d." % (name, exit_code))
+
+    def find_executable(self, name):
+        """
+        Return the full path of the given executable, looked up in the PATH if
+        it is not a path.
+
+        :param str name: An executable name or path.
+        :returns: A path, or None if the executable can't be found.
+        """
+        if os.path.dirname(name):
+            if os.path.isfile(name) and os.access(name, os.X_OK):
+                return name
+            return None
+        for folder in os.environ.get("PATH", "").split(os.pathsep):
+            candidates = [os.path.join(folder, name)]
+            if sys.platform == "win32":
+                candidates.extend(
+                    os.path.join(folder, name + extension)
+                    for extension in os.environ.get("PATHEXT", ".EXE").split(os.pathsep)
+                )
+            for candidate in candidates:
+                if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+                    return candidate
+        return None
+
+    def _get_popen_kwargs(self, devnull):
+        """
+        Return the Popen keyword arguments to start a detached process on the
+        current platform.
+
+        :param devnull: A file object opened on the null device, used for the
+                        standard streams of the process.
+        :returns: A dictionary.
+        """
+        kwargs = {
+            "stdin": devnull,
+            "stdout": devnull,
+            "stderr": devnull,
+        }
+        if sys.platform == "win32":
+            kwargs["creationflags"] = DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["close_fds"] = True
+            # Start a new session so the process is not killed with the
+            # current one.
+            if sys.version_info[0] >= 3:
+                kwargs["start_new_session"] = True
+            else:
+                kwargs["preexec_fn"] = os.setsid
+        return kwargs
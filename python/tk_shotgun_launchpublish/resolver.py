@@ -0,0 +1,469 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Retrieve the published files linked to a selection of entities.
+
+The number of Shotgun requests does not depend on the size of the selection:
+a selection of published files costs a single request, any other entity type
+costs two, one to read the link field on the selected entities and one to
+read the linked published files.
+
+When the reverse query mode is enabled and the published file type has a field
+linking it back to the selected entity type, the published files are instead
+retrieved with a single request, filtered on that field.
+
+Published files are looked up in the in-memory cache first, then in the
+optional on-disk cache. Rows of the on-disk cache are validated with a request
+fetching only the `updated_at` field of the published files.
+
+When extensions are given, linked published files are filtered on the Shotgun
+side, keeping only the ones whose `path_cache` or `code` ends with one of the
+extensions. Filtering falls back to retrieving all linked published files if
+the site rejects the filters, or for entities without any candidate, e.g.
+because their published files have no local storage path. When the number of
+retrieved published files is limited, extensions are queried one at a time in
+their rank order, so the limit never drops a better ranked candidate.
+
+Requests are made without reading the site schema first. Only when the site
+rejects a request is the schema read, to drop the filtered fields it does not
+have. If a schema cache is given, filters and reverse queries rejected by the
+site are remembered there, and not tried again.
+"""
+
+from tank_vendor import shotgun_api3
+
+# Fields matched against the extensions when filtering on the Shotgun side.
+EXTENSION_FILTER_FIELDS = ["path_cache", "code"]
+
+# Fields on published file types linking them back to entities, keyed by
+# published file type and entity type, used for reverse queries.
+REVERSE_LINK_FIELDS = {
+    ("PublishedFile", "Version"): "version",
+}
+
+
+class PublishedFileResolver(object):
+    """
+    Fetch the published files linked to a selection of entities, with the
+    fields needed by the `hook_get_published_file` hooks.
+    """
+
+    def __init__(
+        self,
+        app,
+        published_file_fields,
+        use_reverse_query=False,
+        cache=None,
+        persistent_cache=None,
+        extensions=None,
+        limit=0,
+        schema=None
+    ):
+        """
+        :param app: The Application instance.
+        :param list published_file_fields: The published file fields to fetch.
+        :param bool use_reverse_query: Whether published files should be retrieved
+                                       with a single reverse query when possible.
+        :param cache: An optional :class:`LRUCache` of published files, keyed
+                      by published file type and id.
+        :param persistent_cache: An optional :class:`ResolutionCache`.
+        :param list extensions: Optional extensions, without the leading period,
+                                to filter linked published files on the Shotgun
+                                side.
+        :param int limit: The maximum number of linked published files to retrieve
+                          when a single entity is selected and extensions are given,
+                          0 for no limit.
+        :param schema: An optional :class:`SchemaCache`.
+        """
+        self._app = app
+        self._published_file_fields = published_file_fields
+        self._use_reverse_query = use_reverse_query
+        self._cache = cache
+        self._persistent_cache = persistent_cache
+        self._extensions = extensions or []
+        self._extension_filter_fields = {}
+        self._rejected_reverse_links = set()
+        self._limit = limit
+        self._schema = schema
+
+    def get_linked_published_files(self, published_file_type, entity_type, entity_ids):
+        """
+        Return the published files linked to each of the given entities.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param str entity_type: The type of the selected entities.
+        :param list entity_ids: The ids of the selected entities.
+        :returns: A dictionary where keys are entity ids and values lists of
+                  published file entity dicts with the required fields. Entities
+                  without a published file are not included.
+        """
+        if entity_type == published_file_type:
+            published_files = self._find_published_files(published_file_type, entity_ids)
+            return dict(
+                (entity_id, [published_files[entity_id]])
+                for entity_id in entity_ids if entity_id in published_files
+            )
+
+        reverse_link_field = self.get_reverse_link_field(published_file_type, entity_type)
+        if reverse_link_field:
+            try:
+                return self._find_linked_published_files(
+                    published_file_type,
+                    reverse_link_field,
+                    entity_type,
+                    entity_ids
+                )
+            except shotgun_api3.Fault as e:
+                self._app.logger.debug(
+                    "Reverse query of %s on %s failed, falling back "
+                    "to the link field: %s" % (published_file_type, reverse_link_field, e)
+                )
+                # Don't try again.
+                self._rejected_reverse_links.add((published_file_type, entity_type))
+                if self._schema is not None:
+                    self._schema.set_fact(
+                        "reverse_link_rejected|%s|%s" % (published_file_type, entity_type), True
+                    )
+
+        # The entities are not published files. Retrieve their links first.
+        link_field = self.get_link_field(published_file_type)
+        entities = self._app.shotgun.find(
+            entity_type,
+            [["id", "in", entity_ids]],
+            [link_field]
+        )
+        links = dict(
+            (entity["id"], entity.get(link_field) or []) for entity in entities
+        )
+        published_file_ids = set()
+        for linked_published_files in links.values():
+            published_file_ids.update(pf["id"] for pf in linked_published_files)
+        published_files = self._find_published_files(
+            published_file_type,
+            sorted(published_file_ids),
+            filter_extensions=True
+        )
+        if self._get_extension_filter(published_file_type):
+            # Fall back to all linked published files for entities without
+            # any candidate.
+            unfiltered_ids = set()
+            for linked_published_files in links.values():
+                if not any(pf["id"] in published_files for pf in linked_published_files):
+                    unfiltered_ids.update(pf["id"] for pf in linked_published_files)
+            if unfiltered_ids:
+                published_files.update(
+                    self._find_published_files(published_file_type, sorted(unfiltered_ids))
+                )
+        linked = {}
+        for entity_id, linked_published_files in links.items():
+            # Keep the order of the link field.
+            resolved = [
+                published_files[pf["id"]] for pf in linked_published_files
+                if pf["id"] in published_files
+            ]
+            if resolved:
+                linked[entity_id] = resolved
+        return linked
+
+    def get_link_field(self, published_file_type):
+        """
+        Return the field used on entities to link them to published files.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :returns: A Shotgun field name.
+        """
+        if published_file_type == "PublishedFile":
+            return "published_files"
+        return "tank_published_file"
+
+    def get_reverse_link_field(self, published_file_type, entity_type):
+        """
+        Return the field used on published files to link them back to the given
+        entity type, if reverse queries are enabled and supported, and the site
+        did not reject them before.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param str entity_type: A Shotgun entity type.
+        :returns: A Shotgun field name or None.
+        """
+        if not self._use_reverse_query:
+            return None
+        link_field = REVERSE_LINK_FIELDS.get((published_file_type, entity_type))
+        if not link_field:
+            return None
+        if (published_file_type, entity_type) in self._rejected_reverse_links:
+            return None
+        if self._schema is not None and self._schema.get_fact(
+            "reverse_link_rejected|%s|%s" % (published_file_type, entity_type)
+        ):
+            self._rejected_reverse_links.add((published_file_type, entity_type))
+            return None
+        return link_field
+
+    def invalidate_schema(self):
+        """
+        Forget the filters and reverse queries rejected by the site.
+        """
+        self._extension_filter_fields.clear()
+        self._rejected_reverse_links.clear()
+
+    def _get_extension_filter(self, published_file_type, extensions=None):
+        """
+        Return the filter group matching published files with the given
+        extensions, if any.
+
+        All the :data:`EXTENSION_FILTER_FIELDS` are filtered on, unless the
+        site rejected them before, see :meth:`_find`. No filter is returned if
+        the site rejected all of them.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param list extensions: The extensions to match, all the extensions
+                                given to the resolver if None.
+        :returns: A Shotgun filter group, or None.
+        """
+        if not self._extensions:
+            return None
+        if published_file_type not in self._extension_filter_fields:
+            fields = None
+            if self._schema is not None:
+                fields = self._schema.get_fact("extension_filter_fields|%s" % published_file_type)
+            self._extension_filter_fields[published_file_type] = (
+                EXTENSION_FILTER_FIELDS if fields is None else fields
+            )
+        fields = self._extension_filter_fields[published_file_type]
+        if not fields:
+            return None
+        return {
+            "filter_operator": "any",
+            "filters": [
+                [field, "ends_with", ".%s" % extension]
+                for extension in (self._extensions if extensions is None else extensions)
+                for field in fields
+            ]
+        }
+
+    def _find_linked_published_files(self, published_file_type, link_field, entity_type, entity_ids):
+        """
+        Retrieve the published files linked to the given entities in a single
+        request, filtering published files on their link field.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param str link_field: The published file field linking to the entities.
+        :param str entity_type: The type of the selected entities.
+        :param list entity_ids: The ids of the selected entities.
+        :returns: A dictionary where keys are entity ids and values lists of
+                  published file entity dicts.
+        """
+        fields = self._published_file_fields + [link_field]
+        published_files, filtered = self._find(
+            published_file_type,
+            [[link_field, "in", [{"type": entity_type, "id": entity_id} for entity_id in entity_ids]]],
+            fields,
+            limit=self._limit if len(entity_ids) == 1 else 0
+        )
+        if filtered:
+            # Fall back to all linked published files for entities without
+            # any candidate.
+            found_ids = set(pf[link_field]["id"] for pf in published_files if pf.get(link_field))
+            unfiltered_ids = [entity_id for entity_id in entity_ids if entity_id not in found_ids]
+            if unfiltered_ids:
+                published_files.extend(self._app.shotgun.find(
+                    published_file_type,
+                    [[link_field, "in", [{"type": entity_type, "id": entity_id} for entity_id in unfiltered_ids]]],
+                    fields,
+                    order=[{"field_name": "id", "direction": "asc"}]
+                ))
+        if self._persistent_cache is not None:
+            self._persistent_cache.set_published_files(published_file_type, published_files)
+        linked = {}
+        for published_file in published_files:
+            self._cache_published_file(published_file_type, published_file)
+            entity = published_file.get(link_field)
+            if entity:
+                linked.setdefault(entity["id"], []).append(published_file)
+        return linked
+
+    def _find(self, published_file_type, filters, fields, limit=0):
+        """
+        Retrieve published files with the given filters, and the extension
+        filters if any.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param list filters: A list of Shotgun filters.
+        :param list fields: The fields to retrieve.
+        :param int limit: The maximum number of published files to retrieve,
+                          when filtering on extensions. 0 for no limit.
+        If the site rejects the extension filters, its schema is read to drop
+        the fields it does not have, and the request is tried again. If no
+        field is left, or none is missing, published files are not filtered
+        anymore. The fields used are remembered either way.
+
+        :returns: A tuple with a list of published file entity dicts and whether
+                  they were filtered on their extension.
+        """
+        if self._get_extension_filter(published_file_type):
+            try:
+                if not limit:
+                    return self._app.shotgun.find(
+                        published_file_type,
+                        filters + [self._get_extension_filter(published_file_type)],
+                        fields,
+                        order=[{"field_name": "id", "direction": "asc"}]
+                    ), True
+                # A single request ordered by id would keep the most recent
+                # candidates, whatever their extension. Query extensions in
+                # their rank order instead, and keep the most recent candidates
+                # of the best ranked extension.
+                for extension in self._extensions:
+                    published_files = self._app.shotgun.find(
+                        published_file_type,
+                        filters + [self._get_extension_filter(published_file_type, [extension])],
+                        fields,
+                        order=[{"field_name": "id", "direction": "desc"}],
+                        limit=limit
+                    )
+                    if published_files:
+                        return published_files, True
+                return [], True
+            except shotgun_api3.Fault as e:
+                filter_fields = self._extension_filter_fields[published_file_type]
+                existing_fields = filter_fields
+                if self._schema is not None:
+                    existing_fields = [
+                        field for field in filter_fields
+                        if self._schema.has_field(published_file_type, field)
+                    ]
+                if existing_fields and existing_fields != filter_fields:
+                    self._app.logger.debug(
+                        "Filtering %s on extensions failed, filtering on %s "
+                        "only: %s" % (published_file_type, ", ".join(existing_fields), e)
+                    )
+                    self._set_extension_filter_fields(published_file_type, existing_fields)
+                    return self._find(published_file_type, filters, fields, limit=limit)
+                # If this request fails as well, the extension filters were not
+                # to blame, let the error through and keep them.
+                published_files = self._app.shotgun.find(
+                    published_file_type,
+                    filters,
+                    fields,
+                    order=[{"field_name": "id", "direction": "asc"}]
+                )
+                self._app.logger.debug(
+                    "Filtering %s on extensions failed, falling back "
+                    "to client side filtering: %s" % (published_file_type, e)
+                )
+                # Don't try again.
+                self._set_extension_filter_fields(published_file_type, [])
+                return published_files, False
+        return self._app.shotgun.find(
+            published_file_type,
+            filters,
+            fields,
+            order=[{"field_name": "id", "direction": "asc"}]
+        ), False
+
+    def _set_extension_filter_fields(self, published_file_type, fields):
+        """
+        Remember the fields published files can be filtered on.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param list fields: Field names, empty if filters are rejected.
+        """
+        self._extension_filter_fields[published_file_type] = fields
+        if self._schema is not None:
+            self._schema.set_fact("extension_filter_fields|%s" % published_file_type, fields)
+
+    def _find_published_files(self, published_file_type, published_file_ids, filter_extensions=False):
+        """
+        Retrieve the given published files in a single request, skipping the
+        ones which are already cached.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param list published_file_ids: A list of Shotgun ids.
+        :param bool filter_extensions: Whether published files should be filtered
+                                       on their extension, if extensions were given.
+        :returns: A dictionary where keys are ids and values published file
+                  entity dicts.
+        """
+        found = {}
+        missing_ids = []
+        for published_file_id in published_file_ids:
+            published_file = None
+            if self._cache is not None:
+                published_file = self._cache.get((published_file_type, published_file_id))
+            if published_file:
+                found[published_file_id] = published_file
+            else:
+                missing_ids.append(published_file_id)
+        if missing_ids and self._persistent_cache is not None:
+            missing_ids = self._find_stored_published_files(published_file_type, missing_ids, found)
+        if not missing_ids:
+            return found
+        if filter_extensions:
+            published_files, _ = self._find(
+                published_file_type,
+                [["id", "in", missing_ids]],
+                self._published_file_fields
+            )
+        else:
+            published_files = self._app.shotgun.find(
+                published_file_type,
+                [["id", "in", missing_ids]],
+                self._published_file_fields
+            )
+        if self._persistent_cache is not None:
+            self._persistent_cache.set_published_files(published_file_type, published_files)
+        for published_file in published_files:
+            self._cache_published_file(published_file_type, published_file)
+            found[published_file["id"]] = published_file
+        return found
+
+    def _find_stored_published_files(self, published_file_type, published_file_ids, found):
+        """
+        Retrieve the given published files from the on-disk cache, keeping
+        only the ones which were not updated since they were stored.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param list published_file_ids: A list of Shotgun ids.
+        :param dict found: A dictionary where valid stored published files are
+                           added, keyed by id.
+        :returns: The list of ids which could not be retrieved from the cache.
+        """
+        stored = self._persistent_cache.get_published_files(published_file_type, published_file_ids)
+        if not stored:
+            return published_file_ids
+        current = self._app.shotgun.find(
+            published_file_type,
+            [["id", "in", list(stored.keys())]],
+            ["updated_at"]
+        )
+        for published_file in current:
+            updated_at, stored_published_file = stored[published_file["id"]]
+            if updated_at is not None and updated_at == self._persistent_cache.updated_at_key(published_file):
+                # The stored record has its updated_at serialized as a string,
+                # restore the value Shotgun returned.
+                stored_published_file["updated_at"] = published_file["updated_at"]
+                self._cache_published_file(published_file_type, stored_published_file)
+                found[published_file["id"]] = stored_published_file
+        return [
+            published_file_id for published_file_id in published_file_ids
+            if published_file_id not in found
+        ]
+
+    def _cache_published_file(self, published_file_type, published_file):
+        """
+        Store the given published file in the cache, if any.
+
+        :param str published_file_type: PublishedFile or TankPublishedFile.
+        :param dict published_file: A published file entity dict.
+        """
+        if self._cache is not None:
+            self._cache.set((published_file_type, published_file["id"]), published_file)
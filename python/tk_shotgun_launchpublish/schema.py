@@ -0,0 +1,130 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Remember facts about the schema of the Shotgun site, so they are not probed
+again on each launch.
+"""
+
+import time
+
+
+class SchemaCache(object):
+    """
+    The fields of entity types, and other facts learnt about the site, e.g.
+    filters it rejected.
+
+    Facts are kept in memory for the lifetime of the app and can be stored in
+    the on-disk cache for a limited time, so they are shared by all the
+    processes launching published files. :meth:`invalidate` forgets them, e.g.
+    after the schema of the site was changed.
+    """
+
+    _NAMESPACE = "schema"
+
+    def __init__(self, app, logger, ttl, config_version, persistent_cache=None):
+        """
+        :param app: The Application instance, used to get the Shotgun connection.
+        :param logger: A standard logger.
+        :param float ttl: The number of seconds facts stored on disk are valid for.
+        :param str config_version: A string identifying the configuration, so
+                                   stored facts are ignored when it changes.
+        :param persistent_cache: An optional :class:`ResolutionCache` where
+                                 facts are stored.
+        """
+        self._app = app
+        self._logger = logger
+        self._ttl = ttl
+        self._config_version = config_version
+        self._persistent_cache = persistent_cache
+        self._facts = {}
+
+    def get_fields(self, entity_type):
+        """
+        Return the fields of the given entity type.
+
+        :param str entity_type: A Shotgun entity type.
+        :returns: A set of field names, or None if the schema can't be read.
+        """
+        key = "fields|%s" % entity_type
+        fields = self.get_fact(key)
+        if fields is None:
+            start = time.time()
+            try:
+                fields = sorted(self._app.shotgun.schema_field_read(entity_type).keys())
+            except Exception as e:
+                # The schema may not be readable by the current user, assume
+                # fields exist and let requests fail instead.
+                self._logger.debug("Failed to read the schema of %s: %s" % (entity_type, e), exc_info=True)
+                return None
+            self._logger.debug("Read the schema of %s in %.3fs" % (entity_type, time.time() - start))
+            self.set_fact(key, fields)
+        return set(fields)
+
+    def has_field(self, entity_type, field):
+        """
+        Return whether the given entity type has the given field.
+
+        :param str entity_type: A Shotgun entity type.
+        :param str field: A field name.
+        :returns: True if the field exists, or if the schema can't be read.
+        """
+        fields = self.get_fields(entity_type)
+        return fields is None or field in fields
+
+    def get_fact(self, name):
+        """
+        Return the value of a fact.
+
+        :param str name: The name of the fact.
+        :returns: A JSON serializable value, or None if the fact is not known.
+        """
+        value = self._facts.get(name)
+        if value is None and self._persistent_cache is not None:
+            key = self._get_key(name)
+            stored = self._persistent_cache.get_value(self._NAMESPACE, key)
+            if stored is not None:
+                if stored["expires_at"] < time.time():
+                    self._persistent_cache.delete_value(self._NAMESPACE, key)
+                else:
+                    value = stored["value"]
+                    self._facts[name] = value
+        return value
+
+    def set_fact(self, name, value):
+        """
+        Remember the value of a fact.
+
+        :param str name: The name of the fact.
+        :param value: A JSON serializable value.
+        """
+        self._facts[name] = value
+        if self._persistent_cache is not None:
+            self._persistent_cache.set_value(
+                self._NAMESPACE,
+                self._get_key(name),
+                {"value": value, "expires_at": time.time() + self._ttl}
+            )
+
+    def invalidate(self):
+        """
+        Forget all facts.
+        """
+        self._facts.clear()
+        if self._persistent_cache is not None:
+            self._persistent_cache.delete_values(self._NAMESPACE)
+
+    def _get_key(self, name):
+        """
+        Return the key a fact is stored with.
+
+        :returns: A string.
+        """
+        return "%s|%s" % (self._config_version, name)
@@ -0,0 +1,259 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Detect image sequence paths and find their frames on disk.
+
+Frame numbers can be given with a printf pattern, e.g. `%04d` or `%d`, with
+hashes, e.g. `####`, or with `@` characters, one per digit. The pattern must be
+followed by a character which is neither a letter nor a digit, e.g. the period
+of the extension.
+
+The frames of a sequence are found by listing its folder once, file names are
+matched against a compiled pattern without any per-frame `stat` call, so large
+sequences are scanned quickly. Folder listings and sequences are cached, and
+reused until the folder is modified.
+"""
+
+import os
+import re
+
+from .cache import LRUCache
+
+# A frame pattern in a file name: %04d, %d, #### or @@@@. It can't be followed
+# by a letter or a digit, or partly match a run of # or @, so names like
+# icon@2x.png or 100%done.mov are not image sequences.
+FRAME_PATTERN = re.compile(r"(?:%(?P<padding>0?\d*)d|(?P<hashes>#+)|(?P<ats>@+))(?![A-Za-z0-9#@])")
+
+
+def is_sequence_path(path):
+    """
+    Return whether the file name of the given path has a frame pattern.
+
+    :param str path: A file path.
+    :rtype: bool
+    """
+    return FRAME_PATTERN.search(os.path.basename(path)) is not None
+
+
+def compile_frame_regex(file_name):
+    """
+    Return a regular expression matching the frames of the given file name.
+
+    The frame number is captured by the `frame` group. Padded patterns match
+    frame numbers with at least the given number of digits, larger frame
+    numbers are not padded.
+
+    :param str file_name: A file name with a frame pattern.
+    :returns: A compiled regular expression, or None if the file name has no
+              frame pattern.
+    """
+    parts = split_frame_pattern(file_name)
+    if parts is None:
+        return None
+    head, padding, tail = parts
+    if padding > 1:
+        frame = r"(?P<frame>-?\d{%d,})" % padding
+    else:
+        frame = r"(?P<frame>-?\d+)"
+    return re.compile("^%s%s%s$" % (re.escape(head), frame, re.escape(tail)))
+
+
+def split_frame_pattern(file_name):
+    """
+    Split the given file name around its frame pattern.
+
+    :param str file_name: A file name with a frame pattern.
+    :returns: A tuple with the part before the pattern, the padding and the
+              part after the pattern, or None if there is no frame pattern.
+    """
+    match = FRAME_PATTERN.search(file_name)
+    if match is None:
+        return None
+    if match.group("hashes"):
+        padding = len(match.group("hashes"))
+    elif match.group("ats"):
+        padding = len(match.group("ats"))
+    else:
+        padding = int(match.group("padding") or 1)
+    return file_name[:match.start()], padding, file_name[match.end():]
+
+
+class FrameSequence(object):
+    """
+    The frames of an image sequence found on disk.
+    """
+
+    def __init__(self, path, frames):
+        """
+        :param str path: The path of the sequence, with a frame pattern.
+        :param dict frames: File names keyed by frame number.
+        """
+        self.path = path
+        self.folder, file_name = os.path.split(path)
+        self.head, self.padding, self.tail = split_frame_pattern(file_name)
+        self._frames = frames
+        self.frames = sorted(frames)
+
+    @property
+    def first(self):
+        """
+        The first frame number.
+
+        :rtype: int
+        """
+        return self.frames[0]
+
+    @property
+    def last(self):
+        """
+        The last frame number.
+
+        :rtype: int
+        """
+        return self.frames[-1]
+
+    def get_frame_path(self, frame):
+        """
+        Return the path of the given frame.
+
+        :param int frame: A frame number of the sequence.
+        :returns: A path.
+        """
+        return os.path.join(self.folder, self._frames[frame])
+
+    def get_frame_paths(self):
+        """
+        Return the paths of all the frames, in order.
+
+        :returns: A list of paths.
+        """
+        return [self.get_frame_path(frame) for frame in self.frames]
+
+    def format_range(self, template):
+        """
+        Return a path for the frame range of this sequence, built from the given
+        template.
+
+        The template can use the `{head}`, `{tail}`, `{first}`, `{last}`,
+        `{padding}` and `{hashes}` keys, e.g. `{head}{first}-{last}#{tail}`.
+
+        :param str template: A template.
+        :returns: A path.
+        """
+        return os.path.join(self.folder, template.format(
+            head=self.head,
+            tail=self.tail,
+            first=self.first,
+            last=self.last,
+            padding=self.padding,
+            hashes="#" * self.padding,
+        ))
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __repr__(self):
+        return "<%s %s %d-%d (%d frames)>" % (
+            self.__class__.__name__, self.path, self.first, self.last, len(self.frames)
+        )
+
+
+class SequenceScanner(object):
+    """
+    Find the frames of image sequences, caching folder listings and sequences
+    until their folder is modified.
+    """
+
+    def __init__(self, max_size=128, ttl=300):
+        """
+        :param int max_size: The maximum number of folders and sequences kept
+                             in the cache.
+        :param float ttl: The number of seconds a result is kept for.
+        """
+        self._cache = LRUCache(max_size, ttl)
+        self._listings = LRUCache(max_size, ttl)
+
+    def scan(self, path):
+        """
+        Return the frames of the given image sequence.
+
+        :param str path: A path with a frame pattern.
+        :returns: A :class:`FrameSequence`, or None if the path is not a
+                  sequence or no frame exists.
+        """
+        folder, file_name = os.path.split(path)
+        parts = split_frame_pattern(file_name)
+        if parts is None:
+            return None
+        try:
+            modified = os.stat(folder or ".").st_mtime
+        except OSError:
+            return None
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == modified:
+            return cached[1]
+        head, _, tail = parts
+        regex = compile_frame_regex(file_name)
+        frames = {}
+        for name in self._get_names(folder or ".", modified):
+            # Cheap checks first, to skip unrelated files without matching the
+            # pattern.
+            if name.startswith(head) and name.endswith(tail):
+                match = regex.match(name)
+                if match:
+                    frames[int(match.group("frame"))] = name
+        sequence = FrameSequence(path, frames) if frames else None
+        self._cache.set(path, (modified, sequence))
+        return sequence
+
+    def invalidate(self):
+        """
+        Forget all scanned sequences.
+        """
+        self._cache.invalidate()
+        self._listings.invalidate()
+
+    def _get_names(self, folder, modified):
+        """
+        Return the names of the entries of the given folder, listing it only
+        if it was modified since it was last listed.
+
+        :param str folder: A folder path.
+        :param float modified: The modification time of the folder.
+        :returns: A list of names.
+        """
+        cached = self._listings.get(folder)
+        if cached is not None and cached[0] == modified:
+            return cached[1]
+        names = self._list(folder)
+        self._listings.set(folder, (modified, names))
+        return names
+
+    def _list(self, folder):
+        """
+        Return the names of the entries of the given folder.
+
+        :returns: A list of names, empty if the folder can't be read.
+        """
+        try:
+            scandir = getattr(os, "scandir", None)
+            if scandir is None:
+                return os.listdir(folder)
+            iterator = scandir(folder)
+            try:
+                return [entry.name for entry in iterator]
+            finally:
+                # Python 3.6+ iterators hold a file descriptor until closed.
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+        except OSError:
+            return []
@@ -0,0 +1,230 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Copy published files from slow storage to a local folder before launching
+them, so applications read them from the local disk.
+
+Each staged file, or image sequence, is stored in its own folder named after
+the hash of its source path. Image sequences are identified by their folder
+and the parts of their file name around the frame pattern, so the same frames
+written with `####` or `%04d` share a folder, holding the frames found on
+disk. Staged files keep the size and modification time of their source, a
+staged file is reused as long as they match. The
+modification time of the folders is used to evict the least recently used
+files when the cache is full.
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import sys
+import time
+
+from .sequences import SequenceScanner, is_sequence_path
+
+# The size of the chunks copied when os.sendfile can't be used.
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class StagingCache(object):
+    """
+    A size bounded local copy of published files.
+    """
+
+    def __init__(self, root, max_size, logger, extensions=None, sequence_scanner=None):
+        """
+        :param str root: The local folder files are copied to.
+        :param int max_size: The maximum size of the cache, in bytes.
+        :param logger: A standard logger.
+        :param list extensions: Optional extensions, without the leading period,
+                                of the files to stage. All files are staged if
+                                not set.
+        :param sequence_scanner: An optional :class:`SequenceScanner` used to
+                                 find the frames of image sequences.
+        """
+        self._root = root
+        self._max_size = max_size
+        self._logger = logger
+        self._extensions = tuple(".%s" % extension.lower() for extension in extensions or [])
+        self._sequence_scanner = sequence_scanner or SequenceScanner()
+
+    def stage(self, path):
+        """
+        Return a local copy of the given file or image sequence, copying it if
+        needed.
+
+        Files which are not staged, e.g. because they are larger than the
+        cache, are returned as they are.
+
+        :param str path: A local path, possibly with a frame pattern.
+        :returns: A path.
+        """
+        if self._extensions and not path.lower().endswith(self._extensions):
+            return path
+        key, sources = self._get_sources(path)
+        if not sources:
+            return path
+        total_size = sum(os.stat(source).st_size for source in sources)
+        if total_size > self._max_size:
+            self._logger.debug("Not staging %s, %d bytes exceed the cache size." % (path, total_size))
+            return path
+        folder = os.path.join(self._root, hashlib.sha1(key.encode("utf-8")).hexdigest())
+        start = time.time()
+        copied = 0
+        for source in sources:
+            target = os.path.join(folder, os.path.basename(source))
+            if not self._is_valid(source, target):
+                if not os.path.isdir(folder):
+                    try:
+                        os.makedirs(folder)
+                    except OSError as e:
+                        if e.errno != errno.EEXIST:
+                            raise
+                self._copy(source, target)
+                copied += 1
+        self._remove_stale_files(folder, sources)
+        # Mark the folder as the most recently used one.
+        os.utime(folder, None)
+        self._logger.debug("Staged %s in %s in %.3fs, %d of %d files copied." % (
+            path, folder, time.time() - start, copied, len(sources)
+        ))
+        if copied:
+            self.evict(keep=folder)
+        return os.path.join(folder, os.path.basename(path))
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used staged files until the cache fits in
+        its maximum size.
+
+        :param str keep: A staged folder which must not be removed.
+        """
+        try:
+            names = os.listdir(self._root)
+        except OSError:
+            return
+        folders = []
+        total_size = 0
+        for name in names:
+            folder = os.path.join(self._root, name)
+            size = 0
+            try:
+                for file_name in os.listdir(folder):
+                    size += os.stat(os.path.join(folder, file_name)).st_size
+                folders.append((os.stat(folder).st_mtime, folder, size))
+            except OSError:
+                continue
+            total_size += size
+        folders.sort()
+        for _, folder, size in folders:
+            if total_size <= self._max_size:
+                break
+            if folder == keep:
+                continue
+            self._logger.debug("Evicting %s from the staging cache." % folder)
+            shutil.rmtree(folder, ignore_errors=True)
+            total_size -= size
+
+    def _get_sources(self, path):
+        """
+        Return the key the given path is staged with and the files to copy.
+
+        :param str path: A local path, possibly with a frame pattern.
+        :returns: A tuple with a string and a list of paths, empty if none
+                  exists.
+        """
+        if is_sequence_path(path):
+            sequence = self._sequence_scanner.scan(path)
+            if sequence is not None:
+                key = "%s|%s|%d|%s" % (
+                    os.path.normpath(sequence.folder), sequence.head, sequence.padding, sequence.tail
+                )
+                return key, sequence.get_frame_paths()
+        # Not a sequence, or a file name which only looks like one.
+        return os.path.normpath(path), [path] if os.path.isfile(path) else []
+
+    def _remove_stale_files(self, folder, sources):
+        """
+        Remove the staged files which are not in the given sources anymore,
+        e.g. frames removed from a sequence since it was staged.
+
+        :param str folder: A staged folder.
+        :param list sources: The paths of the source files staged in it.
+        """
+        names = set(os.path.basename(source) for source in sources)
+        for name in os.listdir(folder):
+            # Files being copied by another process end with .part.
+            if name in names or name.endswith(".part"):
+                continue
+            self._logger.debug("Removing %s from the staging cache." % os.path.join(folder, name))
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError as e:
+                self._logger.debug("Failed to remove stale staged file: %s" % e)
+
+    def _is_valid(self, source, target):
+        """
+        Return whether the given staged file matches its source.
+        """
+        try:
+            target_stat = os.stat(target)
+        except OSError:
+            return False
+        source_stat = os.stat(source)
+        return (
+            source_stat.st_size == target_stat.st_size
+            and int(source_stat.st_mtime) == int(target_stat.st_mtime)
+        )
+
+    def _copy(self, source, target):
+        """
+        Copy a file, with the modification time of the source.
+
+        The file is copied to a temporary file first, so other processes never
+        see partially copied files.
+        """
+        temporary = "%s.%d.part" % (target, os.getpid())
+        try:
+            with open(source, "rb") as source_file:
+                with open(temporary, "wb") as target_file:
+                    self._copy_file(source_file, target_file)
+            source_stat = os.stat(source)
+            os.utime(temporary, (source_stat.st_atime, source_stat.st_mtime))
+            if os.path.exists(target):
+                # os.rename does not replace files on Windows.
+                os.remove(target)
+            os.rename(temporary, target)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def _copy_file(self, source_file, target_file):
+        """
+        Copy the content of a file, in the kernel if possible.
+        """
+        sendfile = getattr(os, "sendfile", None)
+        if sendfile is not None and sys.platform.startswith("linux"):
+            size = os.fstat(source_file.fileno()).st_size
+            offset = 0
+            try:
+                while offset < size:
+                    sent = sendfile(target_file.fileno(), source_file.fileno(), offset, size - offset)
+                    if not sent:
+                        break
+                    offset += sent
+                return
+            except OSError as e:
+                # Some file systems don't support it, copy the rest in user space.
+                self._logger.debug("os.sendfile failed, copying in user space: %s" % e)
+                source_file.seek(offset)
+                target_file.seek(offset)
+        shutil.copyfileobj(source_file, target_file, COPY_BUFFER_SIZE)
@@ -0,0 +1,80 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Check that published file paths exist and can be read, concurrently.
+
+On network storage each check can take tens of milliseconds, checking
+candidate paths concurrently bounds the cost to the slowest of them.
+"""
+
+import os
+from multiprocessing.pool import ThreadPool
+
+from .sequences import SequenceScanner, is_sequence_path
+
+
+class PathValidator(object):
+    """
+    Check paths on a bounded pool of threads.
+
+    Image sequences are checked by looking for a single frame. Paths looking
+    like image sequences without any frame on disk are checked as they are,
+    in case the frame pattern is part of an actual file name.
+    """
+
+    def __init__(self, logger, workers, sequence_scanner=None):
+        """
+        :param logger: A standard logger.
+        :param int workers: The maximum number of paths checked concurrently.
+        :param sequence_scanner: An optional :class:`SequenceScanner` used to
+                                 find the frames of image sequences.
+        """
+        self._logger = logger
+        self._workers = max(1, workers)
+        self._sequence_scanner = sequence_scanner or SequenceScanner()
+
+    def is_valid(self, path):
+        """
+        Return whether the given path exists and can be read.
+
+        :param str path: A file path, possibly with a frame pattern.
+        :rtype: bool
+        """
+        if is_sequence_path(path):
+            sequence = self._sequence_scanner.scan(path)
+            if sequence is not None:
+                path = sequence.get_frame_path(sequence.first)
+        return os.access(path, os.R_OK)
+
+    def validate(self, paths):
+        """
+        Check the given paths concurrently.
+
+        :param list paths: A list of paths.
+        :returns: A list of booleans, in the same order as the paths.
+        """
+        if len(paths) < 2:
+            return [self._is_valid(path) for path in paths]
+        pool = ThreadPool(min(len(paths), self._workers))
+        try:
+            return pool.map(self._is_valid, paths)
+        finally:
+            pool.close()
+
+    def _is_valid(self, path):
+        """
+        Check the given path, errors make it invalid.
+        """
+        try:
+            return self.is_valid(path)
+        except Exception as e:
+            self._logger.debug("Failed to check %s: %s" % (path, e), exc_info=True)
+            return False
@@ -0,0 +1,127 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Remember the app instances started by the launch hooks with a control port,
+so files can be sent to a running instance instead of starting a new one.
+"""
+
+import errno
+import os
+import socket
+import sys
+import time
+
+
+class ViewerRegistry(object):
+    """
+    App instances keyed by app command and control port.
+
+    Instances are stored in the on-disk cache, so they are shared by all the
+    processes launching published files on this machine.
+    """
+
+    _NAMESPACE = "viewers"
+
+    def __init__(self, persistent_cache):
+        """
+        :param persistent_cache: A :class:`ResolutionCache` where instances are
+                                 stored.
+        """
+        self._persistent_cache = persistent_cache
+
+    def get_instances(self, app_key):
+        """
+        Return the instances of the given app which may still be running, most
+        recently started first.
+
+        Instances whose process is known to have exited are forgotten.
+
+        :param str app_key: A string identifying the app, e.g. its command.
+        :returns: A list of dictionaries with `pid` and `port` keys.
+        """
+        instances = []
+        prefix = "%s|" % app_key
+        for key, instance in self._persistent_cache.get_values(self._NAMESPACE).items():
+            if not key.startswith(prefix):
+                continue
+            if not self._is_running(instance["pid"]):
+                self._persistent_cache.delete_value(self._NAMESPACE, key)
+                continue
+            instances.append(instance)
+        instances.sort(key=lambda instance: instance["started_at"], reverse=True)
+        return instances
+
+    def register(self, app_key, pid, port):
+        """
+        Remember an instance of the given app.
+
+        :param str app_key: A string identifying the app.
+        :param int pid: The id of the process started for the instance.
+        :param int port: The control port of the instance.
+        """
+        self._persistent_cache.set_value(
+            self._NAMESPACE,
+            "%s|%s" % (app_key, port),
+            {"pid": pid, "port": port, "started_at": time.time()}
+        )
+
+    def unregister(self, app_key, port):
+        """
+        Forget an instance of the given app.
+
+        :param str app_key: A string identifying the app.
+        :param int port: The control port of the instance.
+        """
+        self._persistent_cache.delete_value(self._NAMESPACE, "%s|%s" % (app_key, port))
+
+    def close(self):
+        """
+        Release the on-disk cache.
+        """
+        self._persistent_cache.close()
+
+    @staticmethod
+    def get_free_port():
+        """
+        Return a local TCP port not used at the moment.
+
+        :returns: A port number.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+        finally:
+            sock.close()
+
+    def _is_running(self, pid):
+        """
+        Return whether the given process may still be running.
+
+        Only checked on Linux, other platforms start apps through a launcher
+        process, e.g. `open` on Mac, so the control port is the only way to
+        know whether the instance is running.
+
+        :param int pid: A process id.
+        :rtype: bool
+        """
+        if not pid or not sys.platform.startswith("linux"):
+            return True
+        try:
+            os.kill(pid, 0)
+        except OSError as e:
+            return e.errno == errno.EPERM
+        # Reaped children don't exist anymore, zombies are not running.
+        try:
+            with open("/proc/%d/stat" % pid) as f:
+                return f.read().rsplit(")", 1)[-1].split()[0] != "Z"
+        except (IOError, OSError, IndexError):
+            return True
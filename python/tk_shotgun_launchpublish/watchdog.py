@@ -0,0 +1,113 @@
+# Copyright (c) 2019 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Run callables with a time limit.
+
+Python threads can't be interrupted, a callable which timed out keeps running
+in the background. Callables must call :func:`commit_launch` before launching
+anything, so a callable which timed out is cancelled instead of launching a
+file another callable is launching too.
+"""
+
+import sys
+import threading
+
+from tank import TankError
+
+# The run of the callable executing in the current thread, if any.
+_current = threading.local()
+
+
+class WatchdogTimeout(TankError):
+    """
+    Raised when a callable did not complete in time.
+    """
+
+
+class _Run(object):
+    """
+    The state of a callable run by :func:`run_with_timeout`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timed_out = False
+        self.committed = False
+
+
+def commit_launch():
+    """
+    Declare that the callable running in the current thread is about to do
+    something which can't be undone, e.g. starting an application.
+
+    If the callable timed out, it is cancelled: :class:`WatchdogTimeout` is
+    raised and the action must not be done. Otherwise, the timeout does not
+    apply anymore and :func:`run_with_timeout` waits for the callable to
+    complete.
+
+    Does nothing in callables which are not run with a timeout.
+
+    :raises: :class:`WatchdogTimeout` if the callable timed out.
+    """
+    run = getattr(_current, "run", None)
+    if run is None:
+        return
+    with run.lock:
+        if run.timed_out:
+            raise WatchdogTimeout("Cancelled after timing out.")
+        run.committed = True
+
+
+def run_with_timeout(func, timeout, name="watchdog"):
+    """
+    Run the given callable, and give up waiting for it after the given timeout.
+
+    The callable runs in a daemon thread. A callable which timed out keeps
+    running in the background until it completes, its result being discarded,
+    and is cancelled when it calls :func:`commit_launch`. A callable which
+    called :func:`commit_launch` before timing out is waited for until it
+    completes.
+
+    :param func: A callable without arguments.
+    :param float timeout: The maximum number of seconds to wait for. If None
+                          or 0, the callable is run in the current thread.
+    :param str name: A name for the thread, used in logs.
+    :returns: The value returned by the callable.
+    :raises: :class:`WatchdogTimeout` if the callable did not complete in time,
+             or any exception raised by the callable.
+    """
+    if not timeout:
+        return func()
+
+    outcome = {}
+    run = _Run()
+
+    def target():
+        _current.run = run
+        try:
+            outcome["result"] = func()
+        except Exception:
+            outcome["exc_info"] = sys.exc_info()
+
+    thread = threading.Thread(target=target, name=name)
+    thread.daemon = True
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        with run.lock:
+            run.timed_out = not run.committed
+        if run.timed_out:
+            raise WatchdogTimeout("Timed out after %.1fs." % timeout)
+        # The callable is launching something, it can't be cancelled.
+        thread.join()
+    if "exc_info" in outcome:
+        raise outcome["exc_info"][1]
+    return outcome.get("result")